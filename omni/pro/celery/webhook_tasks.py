@@ -0,0 +1,32 @@
+from celery import Celery
+from celery.signals import worker_process_init
+from omni.pro.webhook.dispatcher import WebhookDispatcher
+from omni.pro.webhook.registry import WebhookRegistry
+from omni.pro.webhook.webhook_handler import WebhookHandler
+
+
+def process_webhook_crud_attrs(payload: dict, context: dict):
+    """
+    Processes the webhooks of CRUD attributes spilled by `WebhookDispatcher` when its queue is full.
+    """
+    WebhookHandler.from_spilled(payload, context).resolve_interface()
+
+
+def _listen_registry(**_kwargs):
+    WebhookRegistry.listen()
+
+
+def register_webhook_tasks(app: Celery):
+    """
+    Registers `process_webhook_crud_attrs` in the Celery app of a worker of the service, under
+    `WebhookDispatcher.spill_task_name`. The worker must consume `WebhookDispatcher.spill_queue` and load
+    the models of the service, as the webhooks read the changed records.
+
+    Example:
+        app = OmniCelery(tenant)
+        register_webhook_tasks(app)
+    """
+    # Threads do not survive the fork of prefork pools, each child starts its own listener
+    worker_process_init.connect(_listen_registry, weak=False)
+    WebhookRegistry.listen()
+    return app.task(name=WebhookDispatcher.spill_task_name)(process_webhook_crud_attrs)
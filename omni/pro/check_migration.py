@@ -8,11 +8,13 @@ from alembic import command
 from alembic.config import Config as AlembicConfig
 from alembic.script import Script, ScriptDirectory
 from omni.pro.config import Config
+from omni.pro.database.postgres import EngineRegistry
 from omni.pro.logger import configure_logger
 from omni.pro.redis import RedisManager
 from sqlalchemy import Column, String, create_engine
 from sqlalchemy import inspect as inspect_sqlalchemy
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.pool import NullPool
 from sqlalchemy_utils import database_exists, create_database
 
 logger = configure_logger(name=__name__)
@@ -78,7 +80,7 @@ class AlembicMigrateCheck(object):
         if postgres_url:
             self.ensure_database_exists()
             self.alembic_config.set_main_option("sqlalchemy.url", postgres_url)
-            self.engine = create_engine(postgres_url)
+            self.engine = EngineRegistry.get_engine(postgres_url)
             self.Session = sessionmaker(bind=self.engine)
 
     def get_postgres_config(self, service_id, tenant_code):
@@ -167,13 +169,15 @@ class AlembicMigrateCheck(object):
         db_name = self.postgres_url.split('/')[-1]
         temp_url = self.postgres_url.replace(f'/{db_name}', '/postgres')  # Usa 'postgres' o cualquier DB predeterminada
 
-        engine = create_engine(temp_url)
-        conn = engine.connect()
-
-        if not database_exists(self.postgres_url):
-            logger.info(f"Database {db_name} does not exist. Creating...")
-            create_database(self.postgres_url)
-            logger.info(f"Database {db_name} successfully created.")
-        else:
-            logger.info(f"Database {db_name} already exists.")
-        conn.close()
+        # One-off connection to the maintenance database, so it is not pooled by EngineRegistry
+        engine = create_engine(temp_url, poolclass=NullPool)
+        try:
+            with engine.connect():
+                if not database_exists(self.postgres_url):
+                    logger.info(f"Database {db_name} does not exist. Creating...")
+                    create_database(self.postgres_url)
+                    logger.info(f"Database {db_name} successfully created.")
+                else:
+                    logger.info(f"Database {db_name} already exists.")
+        finally:
+            engine.dispose()
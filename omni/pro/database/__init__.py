@@ -1,7 +1,30 @@
 from enum import Enum
 
-from .mongo import DatabaseManager, DBUtil, MongoConnection, PolishNotationToMongoDB
-from .postgres import PolishNotationToSQLAlchemy, PostgresDatabaseManager, QueryBuilder, SessionManager
+from .indexes import IndexSync
+from .mongo import (
+    CollectionCache,
+    DatabaseManager,
+    DBUtil,
+    DocumentCountStrategy,
+    DocumentKeysetPagination,
+    MongoClientRegistry,
+    MongoConnection,
+    PolishNotationToMongoDB,
+)
+from .mongo_async import AsyncDatabaseManager
+from .pagination import FIRST_PAGE
+from .postgres import (
+    CountStrategy,
+    EagerLoadPlanner,
+    EngineRegistry,
+    KeysetPagination,
+    PolishNotationToSQLAlchemy,
+    PostgresDatabaseManager,
+    QueryBuilder,
+    SessionManager,
+    SessionRoute,
+)
+from .postgres_async import AsyncPostgresDatabaseManager, AsyncSessionManager
 
 
 class PersistenceTypeEnum(Enum):
@@ -0,0 +1,227 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import mongoengine as mongo
+from omni.pro.config import Config
+from omni.pro.database.mongo import MongoClientRegistry
+from omni.pro.database.postgres import EngineRegistry
+from omni.pro.logger import configure_logger
+from omni.pro.redis import RedisManager
+from sqlalchemy import inspect, text
+
+logger = configure_logger(name=__name__)
+
+
+class IndexSync(object):
+    """
+    Creates the indexes declared by the models, see `index_declarations` of `BaseDocument` and `Base`, in
+    the database of every tenant, and reports the declared indexes that are missing and the existing ones
+    that have never been used.
+    Crea los índices declarados por los modelos en la base de datos de cada tenant, y reporta los índices
+    declarados que faltan y los existentes que nunca se han usado.
+
+    Mongo indexes are built in the background and Postgres indexes with `CREATE INDEX CONCURRENTLY`, so
+    neither blocks writes. Collections and tables of a tenant are synced concurrently.
+
+    Services start it at startup with `RegisterModel.sync_indexes` after registering their models, or
+    through the register methods of `RegisterModel` when `Config.SYNC_INDEXES` is set. Unique declarations,
+    see `unique_index_declarations`, are only satisfied by a unique index and are created unique.
+
+    Example:
+        IndexSync(document_classes=[Product], models=[Order]).start_thread()
+    """
+
+    max_workers: int = 4
+
+    def __init__(self, document_classes: list = None, models: list = None, create: bool = True):
+        """
+        Args:
+            document_classes (list, optional): `BaseDocument` classes to sync.
+            models (list, optional): `Base` models to sync.
+            create (bool): Creates the missing indexes, otherwise they are only reported.
+        """
+        self.document_classes = [cls for cls in document_classes or [] if hasattr(cls, "index_declarations")]
+        self.models = [model for model in models or [] if hasattr(model, "index_declarations")]
+        self.create = create
+        self.redis_manager = RedisManager(
+            host=Config.REDIS_HOST, port=Config.REDIS_PORT, db=Config.REDIS_DB, redis_ssl=Config.REDIS_SSL
+        )
+
+    def start_thread(self) -> threading.Thread:
+        """
+        Runs `run` in a daemon thread so the service starts without waiting for the index builds.
+        """
+        thread = threading.Thread(target=self.run, name="index-sync", daemon=True)
+        thread.start()
+        return thread
+
+    def run(self) -> dict:
+        """
+        Syncs the indexes of every tenant.
+
+        Returns:
+            dict: The report of `sync_documents` and `sync_models` per tenant.
+        """
+        report = {}
+        for tenant in self.redis_manager.get_tenant_codes():
+            report[tenant] = {}
+            try:
+                if self.document_classes:
+                    conn = self.redis_manager.get_mongodb_config(Config.SERVICE_ID, tenant)
+                    alias = MongoClientRegistry.register(
+                        alias=f"{tenant}_{conn['name']}",
+                        name=conn["name"],
+                        host=conn["host"],
+                        port=int(conn["port"]),
+                        username=conn["user"],
+                        password=conn["password"],
+                        **(conn.get("complement") or {}),
+                    )
+                    report[tenant]["documents"] = self.sync_documents(self.document_classes, alias)
+                if self.models:
+                    conn = self.redis_manager.get_postgres_config(Config.SERVICE_ID, tenant)
+                    url = f"postgresql://{conn['user']}:{conn['password']}@{conn['host']}:{conn['port']}/{conn['name']}"
+                    report[tenant]["models"] = self.sync_models(self.models, EngineRegistry.get_engine(url))
+            except Exception as e:
+                logger.error(f"Failed to sync indexes of tenant {tenant}: {e}")
+                continue
+            self._log(tenant, report[tenant])
+        return report
+
+    def sync_documents(self, document_classes: list, alias: str) -> dict:
+        """
+        Syncs the indexes of the collections of `document_classes` in the database of `alias`.
+
+        Returns:
+            dict: `{collection: {"created": [...], "missing": [...], "unused": [...]}}`, indexes as key tuples
+                  except unused ones, which are index names.
+        """
+        db = mongo.get_db(alias)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(lambda cls: self._sync_collection(db, cls), document_classes)
+            return dict(results)
+
+    def sync_models(self, models: list, engine) -> dict:
+        """
+        Syncs the indexes of the tables of `models` in the database of `engine`.
+
+        Returns:
+            dict: `{table: {"created": [...], "missing": [...], "unused": [...]}}`, indexes as column tuples
+                  except unused ones, which are index names.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(lambda model: self._sync_table(engine, model), models)
+            return dict(results)
+
+    def _sync_collection(self, db, document_class) -> tuple:
+        name = document_class._get_collection_name()
+        collection = db[name]
+        existing = [
+            (tuple(key for key, _direction in index["key"]), index.get("unique", False))
+            for index in collection.index_information().values()
+        ]
+        unique = set(document_class.unique_index_declarations())
+        missing = [
+            keys for keys in document_class.index_declarations() if not self._covered(keys, keys in unique, existing)
+        ]
+        created = []
+        if self.create:
+            for keys in missing:
+                try:
+                    collection.create_index([(key, 1) for key in keys], background=True, unique=keys in unique)
+                    created.append(keys)
+                except Exception as e:
+                    logger.warning(f"Failed to create index {keys} on {name}: {e}")
+        unused = []
+        try:
+            for stats in collection.aggregate([{"$indexStats": {}}]):
+                if stats["name"] != "_id_" and not stats["accesses"]["ops"]:
+                    unused.append(stats["name"])
+        except Exception as e:
+            logger.warning(f"Failed to read index stats of {name}: {e}")
+        return name, self._result(missing, created, unused)
+
+    def _sync_table(self, engine, model) -> tuple:
+        table = model.__tablename__
+        inspector = inspect(engine)
+        invalid = self._invalid_indexes(engine, table)
+        existing = [
+            (tuple(index["column_names"]), index["unique"])
+            for index in inspector.get_indexes(table)
+            if index["name"] not in invalid
+        ]
+        existing += [
+            (tuple(constraint["column_names"]), True) for constraint in inspector.get_unique_constraints(table)
+        ]
+        existing.append((tuple(inspector.get_pk_constraint(table)["constrained_columns"]), True))
+        unique = set(model.unique_index_declarations())
+        missing = [keys for keys in model.index_declarations() if not self._covered(keys, keys in unique, existing)]
+        created = []
+        if self.create:
+            # CONCURRENTLY can not run inside a transaction
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                for keys in missing:
+                    # A unique index gets its own name, so an existing non-unique one does not skip it
+                    kind = "UNIQUE INDEX" if keys in unique else "INDEX"
+                    index_name = f"{'ux' if keys in unique else 'ix'}_{table}_{'_'.join(keys)}"[:63]
+                    columns = ", ".join(f'"{key}"' for key in keys)
+                    try:
+                        if index_name in invalid:
+                            # A failed concurrent build leaves an INVALID index that IF NOT EXISTS would skip
+                            connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"'))
+                        connection.execute(
+                            text(f'CREATE {kind} CONCURRENTLY IF NOT EXISTS "{index_name}" ON "{table}" ({columns})')
+                        )
+                        created.append(keys)
+                    except Exception as e:
+                        logger.warning(f"Failed to create index {keys} on {table}: {e}")
+        with engine.connect() as connection:
+            unused = connection.execute(
+                text(
+                    "SELECT s.indexrelname FROM pg_stat_user_indexes s "
+                    "JOIN pg_index i ON i.indexrelid = s.indexrelid "
+                    "WHERE s.relname = :table AND s.idx_scan = 0 AND NOT i.indisunique AND NOT i.indisprimary"
+                ),
+                {"table": table},
+            ).scalars()
+            unused = list(unused)
+        return table, self._result(missing, created, unused)
+
+    @staticmethod
+    def _invalid_indexes(engine, table: str) -> set:
+        with engine.connect() as connection:
+            return set(
+                connection.execute(
+                    text(
+                        "SELECT c.relname FROM pg_index i "
+                        "JOIN pg_class c ON c.oid = i.indexrelid "
+                        "JOIN pg_class t ON t.oid = i.indrelid "
+                        "WHERE t.relname = :table AND NOT i.indisvalid"
+                    ),
+                    {"table": table},
+                ).scalars()
+            )
+
+    @staticmethod
+    def _result(missing: list, created: list, unused: list) -> dict:
+        return {"created": created, "missing": [keys for keys in missing if keys not in created], "unused": unused}
+
+    @staticmethod
+    def _covered(keys: tuple, unique: bool, existing: list) -> bool:
+        # An index also serves every prefix of its keys, but only a unique index on exactly those keys
+        # enforces a unique declaration
+        return any(
+            index[: len(keys)] == keys and (not unique or (index_unique and len(index) == len(keys)))
+            for index, index_unique in existing
+        )
+
+    @staticmethod
+    def _log(tenant: str, report: dict):
+        for kind in report.values():
+            for name, result in kind.items():
+                if result["created"]:
+                    logger.info(f"Created indexes on {tenant}.{name}: {result['created']}")
+                if result["missing"]:
+                    logger.warning(f"Missing indexes on {tenant}.{name}: {result['missing']}")
+                if result["unused"]:
+                    logger.info(f"Unused indexes on {tenant}.{name}: {result['unused']}")
@@ -1,18 +1,51 @@
 import ast
+import base64
+import enum
+import threading
+from typing import Dict, Set
 
 import mongoengine as mongo
-from bson import ObjectId
+from mongoengine import connection as mongo_connection
+from mongoengine import signals
+from mongoengine.queryset import transform
+from bson import ObjectId, json_util
 from omni.pro.airflow.actions import ActionToAirflow
+from omni.pro.database.pagination import FIRST_PAGE, is_first_page, keyset_cursor
 from omni.pro.exceptions import AlreadyExistError, NotFoundError
 from omni.pro.response import MessageResponse
 from omni_pro_base.logger import LoggerTraceback, configure_logger
 from omni_pro_grpc.common import base_pb2
-from pymongo import UpdateOne
+from pymongo import UpdateOne, monitoring
+from pymongo.errors import CollectionInvalid
 
 logger = configure_logger(name=__name__)
 
 
+class DocumentCountStrategy(enum.Enum):
+    """
+    How `DatabaseManager.list_documents` computes the total of a listing.
+
+    EXACT: `count_documents` over the filter, a second execution of the filter.
+    FACET: page and total from a single `$facet` aggregation.
+    ESTIMATE: `estimated_document_count` of the collection metadata when there is no filter, meant for
+        databases dedicated to the tenant. Filtered listings count as EXACT.
+    CAPPED: exact count up to `DatabaseManager.COUNT_CAP` documents.
+    """
+
+    EXACT = "exact"
+    FACET = "facet"
+    ESTIMATE = "estimate"
+    CAPPED = "capped"
+
+    def __str__(self) -> str:
+        return self.value
+
+
 class DatabaseManager(object):
+    ORIGINAL_DOCUMENT_FIELD = "__original_document"
+    DEFAULT_PAGE_SIZE = 10
+    COUNT_CAP = 10000
+
     def __init__(self, host: str, port: int, db: str, user: str, password: str, complement: dict) -> None:
         """
         :param db_object: Database object
@@ -86,6 +119,8 @@ class DatabaseManager(object):
         paginated: dict = None,
         sort_by: list = None,
         str_filter: str = None,
+        count_strategy: DocumentCountStrategy = DocumentCountStrategy.EXACT,
+        cursor: str = None,
     ) -> tuple[list, int]:
         """
         Parameters:
@@ -94,24 +129,39 @@ class DatabaseManager(object):
         group_by (str): Optional field to group results by.
         paginated (dict): Optional dictionary containing pagination information.
         sort_by (list): Optional list of fields to sort results by.
+        count_strategy (DocumentCountStrategy): How the total is computed, see `DocumentCountStrategy`.
+            Paginated filters on reference fields always run in a single `$facet` aggregation.
+        cursor (str): Enables keyset pagination when given, see `DocumentKeysetPagination`. Use `FIRST_PAGE` for
+            the first page and the returned token for the next ones; the page number is ignored.
 
         Returns:
         list: A list of documents matching the specified criteria.
+        In keyset mode also the token of the next page, or None on the last page.
         """
+        count_strategy = DocumentCountStrategy(count_strategy)
+        cursor = keyset_cursor(cursor)
         # Filter documents based on criteria provided
         str_filter = str(str_filter).replace("true", "True").replace("false", "False")
         filter_conditions = ast.literal_eval(str_filter) if str_filter else []
         if filter_conditions and self._is_reference_in_filter(
             document_class=document_class, filter_conditions=filter_conditions
         ):
-            query_set = self._list_documents(tenant, filter_conditions, None, document_class, paginated, sort_by)
-            return query_set, len(query_set)
+            return self._list_documents(
+                tenant, filter_conditions, None, document_class, paginated, sort_by, count_strategy, cursor, fields
+            )
 
         if filter:
             query_set = document_class.objects(context__tenant=tenant).filter(__raw__=filter)
         else:
             query_set = document_class.objects(context__tenant=tenant)
 
+        if count_strategy == DocumentCountStrategy.FACET or cursor is not None:
+            return self._aggregate_documents(
+                document_class, query_set, filter, fields, paginated, sort_by, count_strategy, cursor
+            )
+
+        total = self._count_documents(document_class, query_set, filter, count_strategy)
+
         # Only retrieve specified fields
         if fields:
             query_set = query_set.only(*fields)
@@ -133,7 +183,81 @@ class DatabaseManager(object):
             query_set = query_set.order_by(*sort_by)
 
         # Return list of documents matching the specified criteria and total count of documents
-        return list(query_set), query_set.count()
+        return list(query_set), total
+
+    def _count_documents(self, document_class, query_set, filter: dict, count_strategy: DocumentCountStrategy):
+        if count_strategy == DocumentCountStrategy.ESTIMATE and not filter:
+            return document_class._get_collection().estimated_document_count()
+        if count_strategy == DocumentCountStrategy.CAPPED:
+            return query_set.limit(self.COUNT_CAP).count(with_limit_and_skip=True)
+        return query_set.count()
+
+    def _aggregate_documents(
+        self,
+        document_class,
+        query_set,
+        filter: dict,
+        fields: list,
+        paginated: dict,
+        sort_by: list,
+        count_strategy: DocumentCountStrategy,
+        cursor: str = None,
+    ):
+        """
+        Reads a page of `query_set` with an aggregation, after the `$match` of its filter. FACET computes the
+        total in the same aggregation when there is a page limit, a `$facet` holds its results in a single
+        document, and a cursor selects the page with `DocumentKeysetPagination`.
+        """
+        skip, limit = self._page_bounds(paginated)
+        ordering = query_set.order_by(*sort_by)._ordering if sort_by else []
+        page_stages = []
+        if cursor is not None:
+            keys = DocumentKeysetPagination.sort_keys(ordering)
+            page_stages.extend(DocumentKeysetPagination.stages(keys, cursor, limit or self.DEFAULT_PAGE_SIZE))
+        else:
+            if ordering:
+                page_stages.append({"$sort": dict(ordering)})
+            page_stages.append({"$skip": skip})
+            if limit:
+                page_stages.append({"$limit": limit})
+        if fields:
+            projection = query_set.only(*fields)._loaded_fields.as_dict()
+            if cursor is not None:
+                # The sort values of the last document are needed for the next token
+                projection |= {key: 1 for key, _ in keys}
+            page_stages.append({"$project": projection})
+
+        if count_strategy == DocumentCountStrategy.FACET and (limit or cursor is not None):
+            facet = next(
+                query_set.aggregate([{"$facet": {"results": page_stages, "total": [{"$count": "total"}]}}]), None
+            )
+            items, total = self._read_facet(facet)
+        else:
+            items = list(query_set.aggregate(page_stages))
+            total = self._count_documents(document_class, query_set, filter, count_strategy)
+
+        if cursor is None:
+            return [document_class._from_son(item) for item in items], total
+        items, next_cursor = DocumentKeysetPagination.page(items, keys, limit or self.DEFAULT_PAGE_SIZE)
+        return [document_class._from_son(item) for item in items], total, next_cursor
+
+    @staticmethod
+    def _read_facet(facet: dict) -> tuple[list, int]:
+        if not facet:
+            return [], 0
+        total = facet["total"][0]["total"] if facet["total"] else 0
+        return facet["results"], total
+
+    @staticmethod
+    def _page_bounds(paginated: dict) -> tuple[int, int]:
+        """
+        Returns the documents to skip and the page size, or (0, None) without pagination.
+        """
+        if not paginated:
+            return 0, None
+        page = max(int(paginated.get("page") or 1), 1)
+        per_page = max(int(paginated.get("per_page") or 10), 1)
+        return (page - 1) * per_page, per_page
 
     def _is_reference_in_filter(self, document_class, filter_conditions: list):
         for condition in filter_conditions:
@@ -154,27 +278,162 @@ class DatabaseManager(object):
         return False
 
     def _list_documents(
-        self, tenant: str, filter_conditions: list, id: str, document_class, paginated: dict, sort: list = None
-    ) -> list:
+        self,
+        tenant: str,
+        filter_conditions: list,
+        id: str,
+        document_class,
+        paginated: dict,
+        sort: list = None,
+        count_strategy: DocumentCountStrategy = DocumentCountStrategy.FACET,
+        cursor: str = None,
+        fields: list = None,
+    ) -> tuple[list, int]:
         # filter = ["or", ("active","=",True), "and", ("appointment__id", "=", "65e1e7c1379356701b5f6b59"), ("context.tenant.value","=","TEST")]
+        count_limit = self.COUNT_CAP if count_strategy == DocumentCountStrategy.CAPPED else None
+        # A $facet returns its results in one document, limited to 16 MB, so only pages use it
+        with_total = cursor is not None or bool(self._page_bounds(paginated)[1])
         pipeline = self.parse_expression_to_pipeline(
             document_class=document_class,
             filter_conditions=filter_conditions,
             id=id,
             paginated=paginated,
             sort=sort,
+            with_total=with_total,
+            count_limit=count_limit,
+            cursor=cursor,
+            fields=fields,
+            tenant=tenant,
         )
 
-        query_set = []
-        for item in document_class._get_collection().aggregate(pipeline):
-            inst = document_class._from_son(item)
-            inst.reload()
-            query_set.append(inst)
-        return query_set
+        # The pipeline returns the stored documents, so no reload() per row is needed
+        collection = document_class._get_collection()
+        if with_total:
+            items, total = self._read_facet(next(collection.aggregate(pipeline), None))
+        else:
+            items = list(collection.aggregate(pipeline))
+            counted = next(
+                collection.aggregate(self._count_pipeline(document_class, filter_conditions, id, tenant, count_limit)),
+                None,
+            )
+            total = counted["total"] if counted else 0
+        if cursor is None:
+            return [document_class._from_son(item) for item in items], total
+        _skip, limit = self._page_bounds(paginated)
+        keys = DocumentKeysetPagination.sort_keys(self._sort_ordering(sort))
+        items, next_cursor = DocumentKeysetPagination.page(items, keys, limit or self.DEFAULT_PAGE_SIZE)
+        return [document_class._from_son(item) for item in items], total, next_cursor
+
+    def _count_pipeline(self, document_class, filter_conditions: list, id: str, tenant: str, count_limit: int):
+        """
+        Returns the aggregation counting the documents of the filter, up to `count_limit` when given.
+        """
+        pipeline = self.parse_expression_to_pipeline(document_class, filter_conditions, id, tenant=tenant)
+        if count_limit:
+            pipeline.append({"$limit": count_limit})
+        pipeline.append({"$count": "total"})
+        return pipeline
+
+    @staticmethod
+    def _lookup_projection(paths: list[list], ref_field: str) -> dict:
+        """
+        Returns the `$project` of a joined document with the fields under `ref_field` used by `paths`.
+        """
+        ref_parts = ref_field.split(".")
+        projection = {}
+        for parts in paths:
+            if parts[: len(ref_parts)] == ref_parts and len(parts) > len(ref_parts):
+                field = parts[len(ref_parts)]
+                projection["_id" if field == "id" else field] = 1
+        return projection or {"_id": 1}
+
+    @staticmethod
+    def _sort_ordering(sort: list) -> list[tuple]:
+        return [(item[1:], 1 if item.startswith("+") else -1) for item in sort or [] if item]
+
+    def _fields_projection(self, document_class, fields: list) -> dict:
+        return document_class.objects.only(*fields)._loaded_fields.as_dict()
+
+    @staticmethod
+    def _all_of(conditions: list) -> dict:
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+    def _compile_condition(self, document_class, condition: tuple, operator_mapping: dict) -> "_PipelineCondition":
+        """
+        Compiles a (field, operator, value) condition to its `$match` and the references it has to join.
+        A condition on the id of a reference also gets a `local_match` on the stored ObjectId, which does not
+        join it but is only valid while the reference has not been replaced by a `$lookup`.
+        """
+        field, operator, value = condition
+        mongo_operator = operator_mapping.get(operator)
+        parts = field.split("__") if "__" in field else field.split(".")
+
+        # Construir referencia para campos de múltiples niveles
+        lookups = {}
+        field_obj = None
+        for i, part in enumerate(parts[:-1]):
+            # Determinar si el campo actual es un campo de referencia
+            if i == 0:
+                field_obj = getattr(document_class, part, None)
+            else:
+                field_obj = (
+                    getattr(field_obj.document_type, part, None)
+                    if field_obj and hasattr(field_obj, "document_type")
+                    else None
+                )
+            if field_obj and isinstance(field_obj, mongo.fields.ReferenceField):
+                lookups[".".join(parts[: i + 1])] = field_obj.document_type._meta["collection"]
+
+        local_path = None
+        if parts[-1] == "id":
+            value = [ObjectId(item) for item in value] if isinstance(value, (list, tuple)) else ObjectId(value)
+            parts[-1] = "_id"
+            local_field = ".".join(parts[:-1])
+            if list(lookups) == [local_field]:
+                # El id de la referencia es el valor almacenado en el campo local
+                local_path = local_field
+
+        def build_match(path: str) -> dict:
+            # Manejo especial para 'like' y '!like', asumiendo que usas expresiones regulares
+            if operator in ["like", "ilike"]:
+                return {path: {"$regex": value, "$options": "i"}}
+            if operator == "!like":
+                return {path: {"$not": {"$regex": value, "$options": "i"}}}
+            if mongo_operator:
+                # Asegurar el mapeo correcto para otros operadores
+                return {path: {mongo_operator: value}}
+            raise ValueError(f"Operador no soportado: {operator}")
+
+        match = build_match(".".join(parts))
+        local_match = build_match(local_path) if local_path else None
+        positive = operator in ("=", ">", "<", ">=", "<=", "in", "like", "ilike") and value is not None
+        return _PipelineCondition(match, lookups, positive=positive, local_match=local_match)
 
     def parse_expression_to_pipeline(
-        self, document_class, filter_conditions: list, id: str, sort: list = None, paginated: dict = None
+        self,
+        document_class,
+        filter_conditions: list,
+        id: str,
+        sort: list = None,
+        paginated: dict = None,
+        with_total: bool = False,
+        count_limit: int = None,
+        cursor: str = None,
+        fields: list = None,
+        tenant: str = None,
     ) -> list:
+        """
+        Builds the aggregation of a filter in polish notation. With `with_total` the sort, the page and the
+        total are computed in a single `$facet` stage that outputs {"results": [...], "total": [{"total": n}]},
+        counting up to `count_limit` documents when given. A `cursor` that is not None replaces the skip by
+        the range of `DocumentKeysetPagination` and fetches one extra document to detect the last page.
+        Only the `fields` requested are projected, and each `$lookup` only brings the fields of the joined
+        document that the filter and the sort use.
+
+        Each reference path is joined once however many conditions cross it. The tenant and the conditions
+        on local fields, `reference__id` included, are matched before the joins so they can use indexes, and
+        documents without the reference are kept unless a condition of the top-level AND requires it.
+        """
         pipeline = []
         operator_mapping = {
             "=": "$eq",
@@ -189,85 +448,113 @@ class DatabaseManager(object):
             "like": "$regex",
             "ilike": "$regex",
         }
+        # Rutas usadas por el filtro y el orden, para proyectar solo esos campos en cada $lookup
+        used_paths = [
+            condition[0].split("__") if "__" in condition[0] else condition[0].split(".")
+            for condition in filter_conditions
+            if isinstance(condition, tuple)
+        ] + [key.split(".") for key, _ in self._sort_ordering(sort)]
+        # Las condiciones de tenant y de campos locales van antes de los $lookup para usar los índices
+        local_conditions = [{"context.tenant": tenant}] if tenant else []
+        lookups = {}
+        required = set()
         # Agregar filtro por _id si está presente
         if id:
-            pipeline.append({"$match": {"_id": ObjectId(id)}})
+            local_conditions.insert(0, {"_id": ObjectId(id)})
 
         # Preparar para condiciones de filtro
         else:
             stack = []
             for condition in reversed(filter_conditions):
                 if isinstance(condition, tuple):
-                    field, operator, value = condition
-                    mongo_operator = operator_mapping.get(operator)
-                    parts = field.split("__") if "__" in field else field.split(".")
-
-                    # Construir referencia para campos de múltiples niveles
-                    ref_field = ""
-                    for i, part in enumerate(parts[:-1]):
-                        if i > 0:
-                            ref_field += "."
-                        ref_field += part
-
-                        # Determinar si el campo actual es un campo de referencia
-                        field_obj = getattr(document_class, parts[0], None)
-                        for sub_part in parts[1 : i + 1]:
-                            field_obj = (
-                                getattr(field_obj.document_type, sub_part, None)
-                                if field_obj and hasattr(field_obj, "document_type")
-                                else None
-                            )
-
-                        if field_obj and isinstance(field_obj, mongo.fields.ReferenceField):
-                            pipeline.append(
-                                {
-                                    "$lookup": {
-                                        "from": field_obj.document_type._meta["collection"],
-                                        "localField": f"{ref_field}",
-                                        "foreignField": "_id",
-                                        "as": ref_field,
-                                    }
-                                }
-                            )
-                            pipeline.append({"$unwind": f"${ref_field}"})
-
-                    if parts[-1] == "id":
-                        value = ObjectId(value)
-                        parts[-1] = "_id"
-
-                    # condition = {".".join(parts): value}
-                    # Manejo especial para 'like' y '!like', asumiendo que usas expresiones regulares
-                    if operator in ["like", "ilike"]:
-                        condition = {".".join(parts): {"$regex": value, "$options": "i"}}
-                    elif operator == "!like":
-                        condition = {".".join(parts): {"$not": {"$regex": value, "$options": "i"}}}
-                    else:
-                        # Asegurar el mapeo correcto para otros operadores
-                        if mongo_operator:
-                            condition = {".".join(parts): {mongo_operator: value}}
-                        else:
-                            raise ValueError(f"Operador no soportado: {operator}")
-                    stack.append(condition)
+                    stack.append(self._compile_condition(document_class, condition, operator_mapping))
                 else:
                     # Combinar condiciones usando el operador
-                    conditions = {f"${condition}": stack}
-                    stack = [conditions]
+                    stack = [
+                        _PipelineCondition(
+                            {f"${condition}": [node.match for node in stack]},
+                            {ref: coll for node in stack for ref, coll in node.lookups.items()},
+                            children=stack if condition == "and" else None,
+                        )
+                    ]
 
+            joined_conditions = []
             if stack:
-                pipeline.append({"$match": stack[0]})
-
+                conjuncts = stack[0].children or [stack[0]]
+                local_conditions.extend(node.match for node in conjuncts if not node.lookups)
+                # Solo el id de una referencia en el AND se compara con el valor almacenado, sin $lookup
+                local_conditions.extend(node.local_match for node in conjuncts if node.lookups and node.local_match)
+                joined = [node for node in conjuncts if node.lookups and not node.local_match]
+                joined_conditions = [node.match for node in joined]
+                for node in joined:
+                    lookups |= node.lookups
+                # Solo un $unwind requerido por una condición positiva del AND puede descartar documentos
+                required = {ref for node in joined if node.positive for ref in node.lookups}
+
+            if lookups:
+                # Guardar el documento original antes de que $lookup sobrescriba las referencias
+                pipeline.append({"$addFields": {self.ORIGINAL_DOCUMENT_FIELD: "$$ROOT"}})
+            for ref_field, collection in lookups.items():
+                pipeline.append(
+                    {
+                        # La forma let/$expr es la que admite MongoDB 4.x junto con un pipeline
+                        "$lookup": {
+                            "from": collection,
+                            "let": {"ref": f"${ref_field}"},
+                            "pipeline": [
+                                {"$match": {"$expr": {"$eq": ["$_id", "$$ref"]}}},
+                                {"$project": self._lookup_projection(used_paths, ref_field)},
+                            ],
+                            "as": ref_field,
+                        }
+                    }
+                )
+                pipeline.append(
+                    {"$unwind": {"path": f"${ref_field}", "preserveNullAndEmptyArrays": ref_field not in required}}
+                )
+            if joined_conditions:
+                pipeline.append({"$match": self._all_of(joined_conditions)})
+        has_lookup = bool(lookups)
+        if local_conditions:
+            pipeline.insert(0, {"$match": self._all_of(local_conditions)})
+
+        page_stages = []
+        skip_amount, per_page = self._page_bounds(paginated)
+        if cursor is not None:
+            keys = DocumentKeysetPagination.sort_keys(self._sort_ordering(sort))
+            page_stages.extend(DocumentKeysetPagination.stages(keys, cursor, per_page or self.DEFAULT_PAGE_SIZE))
         # Añadir ordenamiento si está presente
-        if sort:
-            pipeline.append({"$sort": {item[1:]: 1 if item.startswith("+") else -1 for item in sort}})
+        elif sort:
+            page_stages.append({"$sort": dict(self._sort_ordering(sort))})
 
         # Añadir paginación si está presente
-        if paginated:
-            page = max(paginated.get("page", 1), 1)  # Asegurar que la página sea al menos 1
-            per_page = max(paginated.get("per_page", 10), 1)  # Asegurar que per_page sea positivo
-            skip_amount = (page - 1) * per_page
-            if skip_amount >= 0:  # Añadir skip solo si es no negativo
-                pipeline.append({"$skip": skip_amount})
-            pipeline.append({"$limit": per_page})
+        if paginated and cursor is None:
+            page_stages.append({"$skip": skip_amount})
+            page_stages.append({"$limit": per_page})
+
+        # Devolver los documentos tal como están almacenados
+        if has_lookup:
+            if cursor is not None:
+                # Los valores de orden de las referencias solo existen antes de restaurar el documento
+                page_stages.append(DocumentKeysetPagination.keep_values(keys, self.ORIGINAL_DOCUMENT_FIELD))
+            page_stages.append({"$replaceRoot": {"newRoot": f"${self.ORIGINAL_DOCUMENT_FIELD}"}})
+
+        # Proyectar solo los campos solicitados
+        if fields:
+            projection = self._fields_projection(document_class, fields)
+            if cursor is not None and has_lookup:
+                projection[DocumentKeysetPagination.VALUES_FIELD] = 1
+            elif cursor is not None:
+                projection |= {key: 1 for key, _ in keys}
+            page_stages.append({"$project": projection})
+
+        if with_total:
+            total_stages = [{"$limit": count_limit}] if count_limit else []
+            total_stages.append({"$count": "total"})
+            # Un sub-pipeline de $facet no puede estar vacío
+            pipeline.append({"$facet": {"results": page_stages or [{"$skip": 0}], "total": total_stages}})
+        else:
+            pipeline.extend(page_stages)
 
         return pipeline
 
@@ -504,6 +791,8 @@ class DatabaseManager(object):
         msg_success: str,
         msg_exception: str,
         entry_field_name: str,
+        count_strategy: DocumentCountStrategy = DocumentCountStrategy.EXACT,
+        cursor: str = None,
         **kwargs,
     ):
         """
@@ -514,9 +803,13 @@ class DatabaseManager(object):
         :param message_response: message_response is a MessageResponse instance\n
         :param msg_success: msg_success is a success message\n
         :param msg_exception: msg_exception is a exception message\n
+        :param count_strategy: count_strategy is a DocumentCountStrategy for the total\n
+        :param cursor: cursor is a keyset pagination token, see DocumentKeysetPagination. The next token is\n
+            returned in the `next_cursor` field when the response message has one\n
         :return: MessageResponse cls param
         """
         try:
+            cursor = keyset_cursor(cursor)
             data = DBUtil.db_prepared_statement(
                 request.id,
                 request.fields,
@@ -525,15 +818,20 @@ class DatabaseManager(object):
                 None,
                 request.sort_by,
             )
-            list_docs, total = self.list_documents(
+            result = self.list_documents(
                 context.db_name,
                 request.context.tenant,
                 document_class,
                 **data,
+                count_strategy=count_strategy,
+                cursor=cursor,
             )
+            list_docs, total = result[:2]
             kwargs_return = {
                 f"{entry_field_name}": [doc.to_proto() for doc in list_docs],
             } | kwargs
+            if cursor is not None and "next_cursor" in message_response.cls.DESCRIPTOR.fields_by_name:
+                kwargs_return["next_cursor"] = result[2] or ""
             return message_response.fetched_response(
                 message=msg_success,
                 total=total,
@@ -550,8 +848,391 @@ class DatabaseManager(object):
             return message_response.internal_response(message=msg_exception)
 
 
+class _PipelineCondition(object):
+    """
+    A compiled filter condition: its `$match`, the references it joins as {path: collection}, whether it
+    only matches documents that have those references, its conditions when it is an AND, and the `$match`
+    without joins that replaces it when it is matched before the lookups.
+    """
+
+    def __init__(
+        self, match: dict, lookups: dict, positive: bool = False, children: list = None, local_match: dict = None
+    ):
+        self.match = match
+        self.lookups = lookups
+        self.positive = positive
+        self.children = children
+        self.local_match = local_match
+
+
+class DocumentKeysetPagination(object):
+    """
+    Keyset (cursor) pagination for `DatabaseManager.list_documents`.
+
+    The next page is selected with a range `$match` on the sort key plus `_id` instead of `$skip`, so the
+    cost of a page does not grow with its depth. The position is handed to the client as an opaque token
+    encoded from the sort values of the last document returned, and `FIRST_PAGE` requests the first page.
+    """
+
+    FIRST_PAGE = FIRST_PAGE
+    # Field that carries the sort values of a document whose sort keys are lost before the page is read
+    VALUES_FIELD = "__keyset"
+
+    @classmethod
+    def sort_keys(cls, ordering: list[tuple]) -> list[tuple]:
+        """
+        Returns the (db field, direction) sort keys, always ending with `_id`.
+        """
+        keys = [("_id" if key in ("id", "_id") else key, direction) for key, direction in ordering]
+        if not any(key == "_id" for key, _ in keys):
+            keys.append(("_id", keys[-1][1] if keys else 1))
+        return keys
+
+    @classmethod
+    def stages(cls, keys: list[tuple], cursor: str, limit: int) -> list[dict]:
+        """
+        Returns the `$match`, `$sort` and `$limit` stages of a page, fetching one extra document to detect
+        the last page.
+        """
+        stages = []
+        if not is_first_page(cursor):
+            stages.append({"$match": cls.condition(keys, cls.decode(cursor, keys))})
+        stages.append({"$sort": dict(keys)})
+        stages.append({"$limit": limit + 1})
+        return stages
+
+    @classmethod
+    def condition(cls, keys: list[tuple], values: list) -> dict:
+        """
+        Builds the "after this document" condition as an `$or` chain over the sort keys.
+        """
+        clauses = []
+        for idx, (key, direction) in enumerate(keys):
+            clause = {prev_key: values[i] for i, (prev_key, _) in enumerate(keys[:idx])}
+            clause[key] = {"$gt" if direction == 1 else "$lt": values[idx]}
+            clauses.append(clause)
+        return {"$or": clauses}
+
+    @classmethod
+    def keep_values(cls, keys: list[tuple], root: str) -> dict:
+        """
+        Returns the `$addFields` stage that copies the sort values into `VALUES_FIELD` of `root`, keyed by
+        their position, for pages whose documents are replaced by `root` after the sort, as the original
+        document of a `$lookup`.
+        """
+        values = {str(idx): f"${key}" for idx, (key, _) in enumerate(keys)}
+        return {"$addFields": {f"{root}.{cls.VALUES_FIELD}": values}}
+
+    @classmethod
+    def page(cls, items: list, keys: list[tuple], limit: int) -> tuple:
+        """
+        Trims the extra document of `stages` and removes the sort values kept by `keep_values`.
+
+        Returns:
+            tuple: The documents of the page and the token of the next page, or None on the last page.
+        """
+        kept = [item.pop(cls.VALUES_FIELD, None) for item in items]
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        values = kept[limit - 1]
+        if values is not None:
+            values = [values.get(str(idx)) for idx in range(len(keys))]
+        return items, cls.encode(items[-1], keys, values)
+
+    @classmethod
+    def encode(cls, item: dict, keys: list[tuple], values: list = None) -> str:
+        if values is None:
+            values = [cls._value(item, key) for key, _ in keys]
+        return base64.urlsafe_b64encode(json_util.dumps(values).encode()).decode()
+
+    @classmethod
+    def decode(cls, cursor: str, keys: list[tuple]) -> list:
+        try:
+            values = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise ValueError("Invalid pagination cursor")
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("Pagination cursor does not match the sort fields")
+        return values
+
+    @staticmethod
+    def _value(item: dict, key: str):
+        for part in key.split("."):
+            item = item.get(part) if isinstance(item, dict) else None
+        return item
+
+
+class _PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Counts the open and checked out connections of every pymongo pool, keyed by server address."""
+
+    def __init__(self):
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, event, key: str, value: int = 1):
+        address = "%s:%s" % event.address
+        with self._lock:
+            stats = self.stats.setdefault(address, {"open": 0, "checked_out": 0, "created": 0, "wait_failed": 0})
+            stats[key] += value
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(event, "open")
+        self._add(event, "created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(event, "open", -1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._add(event, "wait_failed")
+
+    def connection_checked_out(self, event):
+        self._add(event, "checked_out")
+
+    def connection_checked_in(self, event):
+        self._add(event, "checked_out", -1)
+
+
+class MongoClientRegistry(object):
+    """
+    Process-wide registry of MongoEngine connections keyed by tenant database and host.
+
+    An alias is registered once with the pool settings below and its pymongo client is then reused by
+    every `MongoConnection` leasing it, instead of connecting and disconnecting around each request.
+    An alias is only reconnected when it is leased for a different database or host. A client that is
+    still leased is then retired instead of closed, and closed when its last lease is released, so the
+    requests using it are not cut off. Documents bound to the alias follow the new registration, work
+    that must stay on a tenant database uses the alias of the tenant.
+
+    Example:
+        MongoClientRegistry.configure(max_pool_size=50, min_pool_size=5)
+        alias = MongoClientRegistry.lease("tenant_db", name="db", host="mongo", port=27017, username="u", password="p")
+    """
+
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: int = 300000
+
+    _keys: Dict[str, tuple] = {}
+    _leases: Dict[str, int] = {}
+    # Clients replaced while leased, by alias and client id: [client, leases]
+    _retired: Dict[tuple, list] = {}
+    _listener = _PoolStatsListener()
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, **kwargs):
+        """
+        Overrides the pool settings used for connections registered from now on.
+
+        Args:
+            **kwargs: Any of `max_pool_size`, `min_pool_size` or `max_idle_time_ms`.
+        """
+        for key, value in kwargs.items():
+            if key not in ("max_pool_size", "min_pool_size", "max_idle_time_ms"):
+                raise ValueError(f"Unknown mongo client registry option: {key}")
+            setattr(cls, key, value)
+
+    @classmethod
+    def register(cls, alias: str, name: str, host: str, port: int, username: str, password: str, **options) -> str:
+        """
+        Registers `alias` with the shared pool settings unless it is already registered for the same
+        database and host. Takes the arguments of `mongoengine.register_connection`.
+
+        Returns:
+            str: The alias.
+        """
+        port = int(port) if port else None
+        key = cls._key(name, host, port, username)
+        with cls._lock:
+            if cls._keys.get(alias) != key:
+                if alias in cls._keys:
+                    cls._unregister(alias)
+                pool_options = {
+                    "maxPoolSize": cls.max_pool_size,
+                    "minPoolSize": cls.min_pool_size,
+                    "maxIdleTimeMS": cls.max_idle_time_ms,
+                    "event_listeners": [cls._listener],
+                }
+                mongo.register_connection(
+                    alias=alias,
+                    name=name,
+                    host=host,
+                    port=port,
+                    username=username,
+                    password=password,
+                    **(pool_options | options),
+                )
+                cls._keys[alias] = key
+        return alias
+
+    @classmethod
+    def lease(cls, alias: str, **kwargs):
+        """
+        Registers `alias` if needed, see `register`, and returns its pymongo client.
+
+        Returns:
+            MongoClient: The shared client of the alias.
+        """
+        while True:
+            cls.register(alias, **kwargs)
+            with cls._lock:
+                # Registered again for another database in between, register it back
+                if cls._keys.get(alias) != cls._key(**kwargs):
+                    continue
+                cls._leases[alias] = cls._leases.get(alias, 0) + 1
+                return mongo.get_connection(alias)
+
+    @classmethod
+    def release(cls, alias: str, client=None):
+        """
+        Returns a lease of `alias` taken on `client`. The client stays open for the next lease, unless it
+        was retired and this was its last lease.
+        """
+        with cls._lock:
+            retired = cls._retired.get((alias, id(client))) if client is not None else None
+            if retired is not None and retired[0] is client:
+                retired[1] -= 1
+                if retired[1] <= 0:
+                    cls._retired.pop((alias, id(client)))
+                    cls._close(client)
+            elif cls._leases.get(alias):
+                cls._leases[alias] -= 1
+
+    @classmethod
+    def dispose(cls, alias: str = None):
+        """
+        Disconnects `alias`, or every registered alias when none is given. Leased clients are retired.
+        """
+        with cls._lock:
+            aliases = [alias] if alias else list(cls._keys)
+            for key in aliases:
+                if key in cls._keys:
+                    cls._unregister(key)
+
+    @staticmethod
+    def _key(name: str, host: str, port: int, username: str, **_options) -> tuple:
+        return (name, host, int(port) if port else None, username)
+
+    @classmethod
+    def _unregister(cls, alias: str):
+        cls._keys.pop(alias, None)
+        leases = cls._leases.pop(alias, 0)
+        if not leases:
+            mongo.disconnect(alias)
+            return
+        client = mongo.get_connection(alias)
+        cls._retired.setdefault((alias, id(client)), [client, 0])[1] += leases
+        # Detached first so disconnect only drops the settings and the cached collections of the alias
+        mongo_connection._connections.pop(alias, None)
+        mongo.disconnect(alias)
+
+    @staticmethod
+    def _close(client):
+        # MongoEngine shares a client between aliases with the same settings
+        if all(client is not other for other in mongo_connection._connections.values()):
+            client.close()
+
+    @classmethod
+    def pool_stats(cls) -> Dict[str, dict]:
+        """
+        Returns the registered aliases with their database, host and active leases, and the open and
+        checked out connections per server address.
+        """
+        with cls._lock:
+            aliases = {
+                alias: {"name": name, "host": host, "port": port, "leases": cls._leases.get(alias, 0)}
+                for alias, (name, host, port, _username) in cls._keys.items()
+            }
+        with cls._listener._lock:
+            servers = {address: dict(stats) for address, stats in cls._listener.stats.items()}
+        return {"aliases": aliases, "servers": servers}
+
+
+class CollectionCache(object):
+    """
+    Process-wide cache of the collections that exist in each MongoEngine alias.
+
+    The collections of an alias are listed once, with `warm` at startup or on first use, instead of on
+    every `ExitStackDocument.__enter__`. A missing collection is only created when a save or a bulk insert
+    reaches it, and is then added to the cache.
+    """
+
+    _collections: Dict[str, Set[str]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def warm(cls, alias: str) -> Set[str]:
+        """
+        Lists the collections of `alias` and caches them.
+        """
+        names = set(mongo.get_db(alias).list_collection_names())
+        with cls._lock:
+            cls._collections[alias] = names
+        return names
+
+    @classmethod
+    def exists(cls, alias: str, collection_name: str) -> bool:
+        with cls._lock:
+            names = cls._collections.get(alias)
+        if names is None:
+            names = cls.warm(alias)
+        return collection_name in names
+
+    @classmethod
+    def ensure(cls, document_class):
+        """
+        Creates the collection of `document_class` in its current alias when it does not exist yet.
+        """
+        alias = document_class._meta.get("db_alias") or mongo.DEFAULT_CONNECTION_NAME
+        collection_name = document_class._get_collection_name()
+        if not collection_name or cls.exists(alias, collection_name):
+            return
+        try:
+            mongo.get_db(alias).create_collection(collection_name)
+        except CollectionInvalid:
+            # Creada en paralelo por otro proceso
+            pass
+        with cls._lock:
+            cls._collections.setdefault(alias, set()).add(collection_name)
+
+    @classmethod
+    def invalidate(cls, alias: str = None):
+        with cls._lock:
+            if alias:
+                cls._collections.pop(alias, None)
+            else:
+                cls._collections.clear()
+
+    @classmethod
+    def _on_write(cls, sender, **kwargs):
+        cls.ensure(sender)
+
+
+signals.pre_save.connect(CollectionCache._on_write, weak=False)
+signals.pre_bulk_insert.connect(CollectionCache._on_write, weak=False)
+
+
 class MongoConnection(object):
-    """A MongoConnection class that can dynamically connect to a MongoDB database with MongoEngine and close the connection after each query.
+    """A MongoConnection class that leases a pooled MongoEngine connection from `MongoClientRegistry`.
 
     Args:
         host (str): The hostname or IP address of the MongoDB server.
@@ -559,33 +1240,38 @@ class MongoConnection(object):
         username (str): The username for the MongoDB database.
         password (str): The password for the MongoDB database.
         database (str): The name of the MongoDB database.
+        alias (str): The MongoEngine alias to lease. By default one per database and host, so leases of
+            different tenant databases never re-register each other's alias. Documents are bound to a
+            tenant alias with `switch_db`, see `ExitStackDocument`.
     """
 
-    def __init__(self, host, port, db, username, password, complement):
+    def __init__(self, host, port, db, username, password, complement, alias=None):
         self.host = f"mongodb://{host}:{port}/?{'&'.join([f'{k}={v}' for (k, v) in complement.items()])}"
         self.port = port
         self.username = username
         self.password = password
         self.db = db
+        self.alias = alias or f"{db}_{host}_{port}"
 
     def connect(self):
-        """Connects to the MongoDB database.
+        """Leases the pooled connection of the MongoDB database.
 
         Returns:
-            A MongoEngine connection object.
+            A pymongo client shared through `MongoClientRegistry`.
         """
-        self.connection = mongo.connect(
-            db=self.db,
+        self.connection = MongoClientRegistry.lease(
+            self.alias,
+            name=self.db,
+            host=self.host,
+            port=None,
             username=self.username,
             password=self.password,
-            host=self.host,
         )
         return self.connection
 
     def close(self):
-        """Closes the connection to the MongoDB database."""
-        # self.connection.close()
-        mongo.disconnect()
+        """Returns the lease, the pooled connection stays open for the next request."""
+        MongoClientRegistry.release(self.alias, self.connection)
 
     def __enter__(self):
         """Enters a context manager.
@@ -754,6 +1440,21 @@ class DBUtil(object):
             return None
         return f"{'-' if sort_by.type == sort_by.DESC else '+'}{sort_by.name_field}"
 
+    @classmethod
+    def update_fields(cls, kwargs: dict) -> Set[str]:
+        """
+        Returns the fields changed by the keyword arguments of a mongoengine `update`, without the update
+        operator (`set__name`, `push__tags`) and the nested path (`audit__updated_at`).
+        Retorna los campos modificados por los argumentos de un `update`, sin el operador ni la ruta anidada.
+        """
+        fields = set()
+        for key in kwargs:
+            parts = key.split("__")
+            if parts[0] in transform.UPDATE_OPERATORS and len(parts) > 1:
+                parts = parts[1:]
+            fields.add(parts[0])
+        return fields
+
     @classmethod
     def generate_object_id(cls, id=None):
         try:
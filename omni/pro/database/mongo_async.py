@@ -0,0 +1,516 @@
+import ast
+import asyncio
+import threading
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict
+
+from bson import ObjectId
+from mongoengine.context_managers import switch_db
+from mongoengine.queryset import transform
+from omni.pro.config import Config
+from omni.pro.database.mongo import (
+    DatabaseManager,
+    DBUtil,
+    DocumentCountStrategy,
+    DocumentKeysetPagination,
+    MongoClientRegistry,
+)
+from omni.pro.database.pagination import keyset_cursor
+from omni.pro.exceptions import AlreadyExistError, NotFoundError
+from omni.pro.response import MessageResponse
+from omni_pro_base.logger import LoggerTraceback, configure_logger
+from pymongo import UpdateOne
+
+logger = configure_logger(name=__name__)
+
+# Stack of the current task collecting the CRUD attributes for the webhooks, see `AsyncExitStackDocument`
+current_document_stack: ContextVar = ContextVar("current_document_stack", default=None)
+
+
+class AsyncDatabaseManager(DatabaseManager):
+    """
+    asyncio counterpart of `DatabaseManager` on Motor, for `grpc.aio` servicers.
+
+    Methods mirror `DatabaseManager` as coroutines. Documents are read and written on the collections of
+    the database of the manager, so no `switch_db` is needed and concurrent tasks of different tenants do
+    not share document class state. Created, updated and deleted ids are collected by the
+    `AsyncExitStackDocument` of the task, which hands them to the webhooks on exit.
+
+    Example:
+        manager = AsyncDatabaseManager(**db_params)
+        async with AsyncExitStackDocument(context=context):
+            document = await manager.create_document(db_name, Product, **values)
+    """
+
+    _clients: Dict[tuple, object] = {}
+    _lock = threading.Lock()
+    _switch_lock = threading.Lock()
+
+    def __init__(self, host: str, port: int, db: str, user: str, password: str, complement: dict) -> None:
+        super().__init__(host, port, db, user, password, complement)
+        self.client = self.get_client(host, port, user, password, complement)
+
+    @classmethod
+    def get_client(cls, host: str, port: int, user: str, password: str, complement: dict = None):
+        """
+        Returns the Motor client shared by every manager of the same server and user, with the pool
+        settings of `MongoClientRegistry`.
+        """
+        # Motor comes with the "async" extra, so it is only needed by the services that use this manager
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        port = int(port) if port else None
+        key = (host, port, user)
+        with cls._lock:
+            if key not in cls._clients:
+                cls._clients[key] = AsyncIOMotorClient(
+                    host=host,
+                    port=port,
+                    username=user,
+                    password=password,
+                    maxPoolSize=MongoClientRegistry.max_pool_size,
+                    minPoolSize=MongoClientRegistry.min_pool_size,
+                    maxIdleTimeMS=MongoClientRegistry.max_idle_time_ms,
+                    **(complement or {}),
+                )
+            return cls._clients[key]
+
+    @classmethod
+    def dispose(cls):
+        """
+        Closes every shared Motor client.
+        """
+        with cls._lock:
+            for client in cls._clients.values():
+                client.close()
+            cls._clients.clear()
+
+    def collection(self, document_class):
+        return self.client[self.db][document_class._get_collection_name()]
+
+    async def create_document(self, db_name: str, document_class, **kwargs) -> object:
+        document = document_class(**kwargs)
+        self._stamp(document)
+        document.validate()
+        result = await self.collection(document_class).insert_one(document.to_mongo())
+        document.pk = result.inserted_id
+        document._clear_changed_fields()
+        self._record(document, "create")
+        return document
+
+    async def get_document(self, db_name: str, tenant: str, document_class, **kwargs) -> object:
+        son = await self.collection(document_class).find_one(
+            transform.query(document_class, **kwargs, context__tenant=tenant)
+        )
+        return document_class._from_son(son) if son else None
+
+    async def update_document(self, db_name: str, document_class, id: str, **kwargs) -> object:
+        document = await self._find_by_id(document_class, id)
+        if document is None:
+            return None
+        return await self.update(document, **kwargs)
+
+    async def update(self, document_instance, **kwargs):
+        document_class = type(document_instance)
+        collection = self.collection(document_class)
+        await collection.update_one({"_id": document_instance.pk}, transform.update(document_class, **kwargs))
+        document = await self._find_by_id(document_class, document_instance.pk)
+        if kwargs:
+            self._record(document, "update", DBUtil.update_fields(kwargs))
+        return document
+
+    async def delete(self, document_instance):
+        await self.collection(type(document_instance)).delete_one({"_id": document_instance.pk})
+        self._record(document_instance, "delete")
+        return document_instance
+
+    async def delete_document(self, db_name: str, document_class, id: str) -> object:
+        document = await self._find_by_id(document_class, id)
+        return await self.delete(document) if document else None
+
+    async def delete_documents(self, db_name, document_class, **kwargs):
+        collection = self.collection(document_class)
+        query = transform.query(document_class, **kwargs)
+        documents = [document_class._from_son(son) async for son in collection.find(query)]
+        result = await collection.delete_many({"_id": {"$in": [document.pk for document in documents]}})
+        for document in documents:
+            self._record(document, "delete")
+        return result.deleted_count
+
+    async def update_embeded_document(
+        self,
+        db_name: str,
+        document_class,
+        filters: dict,
+        update: dict,
+        many: bool = False,
+    ) -> object:
+        collection = self.collection(document_class)
+        query = transform.query(document_class, **filters)
+        update = transform.update(document_class, **update)
+        if many:
+            await collection.update_many(query, update)
+            return [document_class._from_son(son) async for son in collection.find(query)]
+        await collection.update_one(query, update)
+        son = await collection.find_one(query)
+        return document_class._from_son(son) if son else None
+
+    async def batch_upsert(self, document_isntance, data):
+        """
+        Batch upserts a list of records into the database, see `DatabaseManager.batch_upsert`.
+        Actualiza por lotes una lista de registros en la base de datos.
+        """
+        bulk_operations = [
+            UpdateOne(
+                {"external_id": obj["external_id"]},
+                {"$set": obj | {"tenant": data["context"]["tenant"], "updated_by": data["context"]["user"]}},
+                upsert=True,
+            )
+            for obj in data["models"]
+        ]
+        return await self.collection(document_isntance).bulk_write(bulk_operations, ordered=False)
+
+    async def list_documents(
+        self,
+        db_name: str,
+        tenant: str,
+        document_class,
+        fields: list = None,
+        filter: dict = None,
+        group_by: str = None,
+        paginated: dict = None,
+        sort_by: list = None,
+        str_filter: str = None,
+        count_strategy: DocumentCountStrategy = DocumentCountStrategy.EXACT,
+        cursor: str = None,
+    ) -> tuple[list, int]:
+        """
+        Lists documents, see `DatabaseManager.list_documents`. `group_by` is not supported.
+        """
+        count_strategy = DocumentCountStrategy(count_strategy)
+        cursor = keyset_cursor(cursor)
+        str_filter = str(str_filter).replace("true", "True").replace("false", "False")
+        filter_conditions = ast.literal_eval(str_filter) if str_filter else []
+        if filter_conditions and self._is_reference_in_filter(
+            document_class=document_class, filter_conditions=filter_conditions
+        ):
+            return await self._list_documents(
+                tenant, filter_conditions, None, document_class, paginated, sort_by, count_strategy, cursor, fields
+            )
+
+        collection = self.collection(document_class)
+        match = {"context.tenant": tenant}
+        if filter:
+            match = {"$and": [match, filter]}
+        skip, limit = self._page_bounds(paginated)
+        ordering = [
+            (document_class._translate_field_name(key), direction) for key, direction in self._sort_ordering(sort_by)
+        ]
+        projection = self._fields_projection(document_class, fields) if fields else None
+
+        if cursor is not None:
+            keys = DocumentKeysetPagination.sort_keys(ordering)
+            page_stages = DocumentKeysetPagination.stages(keys, cursor, limit or self.DEFAULT_PAGE_SIZE)
+            if projection:
+                page_stages.append({"$project": projection | {key: 1 for key, _ in keys}})
+        else:
+            page_stages = [{"$sort": dict(ordering)}] if ordering else []
+            page_stages.append({"$skip": skip})
+            if limit:
+                page_stages.append({"$limit": limit})
+            if projection:
+                page_stages.append({"$project": projection})
+
+        if count_strategy == DocumentCountStrategy.FACET and (limit or cursor is not None):
+            facet = await collection.aggregate(
+                [{"$match": match}, {"$facet": {"results": page_stages, "total": [{"$count": "total"}]}}]
+            ).to_list(length=1)
+            items, total = self._read_facet(facet[0] if facet else None)
+        else:
+            items, total = await asyncio.gather(
+                collection.aggregate([{"$match": match}] + page_stages).to_list(length=None),
+                self._count(collection, match, filter, count_strategy),
+            )
+
+        if cursor is None:
+            return [document_class._from_son(item) for item in items], total
+        items, next_cursor = DocumentKeysetPagination.page(items, keys, limit or self.DEFAULT_PAGE_SIZE)
+        return [document_class._from_son(item) for item in items], total, next_cursor
+
+    async def _count(self, collection, match: dict, filter: dict, count_strategy: DocumentCountStrategy) -> int:
+        if count_strategy == DocumentCountStrategy.ESTIMATE and not filter:
+            return await collection.estimated_document_count()
+        if count_strategy == DocumentCountStrategy.CAPPED:
+            return await collection.count_documents(match, limit=self.COUNT_CAP)
+        return await collection.count_documents(match)
+
+    async def _list_documents(
+        self,
+        tenant: str,
+        filter_conditions: list,
+        id: str,
+        document_class,
+        paginated: dict,
+        sort: list = None,
+        count_strategy: DocumentCountStrategy = DocumentCountStrategy.FACET,
+        cursor: str = None,
+        fields: list = None,
+    ) -> tuple[list, int]:
+        count_limit = self.COUNT_CAP if count_strategy == DocumentCountStrategy.CAPPED else None
+        # A $facet returns its results in one document, limited to 16 MB, so only pages use it
+        with_total = cursor is not None or bool(self._page_bounds(paginated)[1])
+        pipeline = self.parse_expression_to_pipeline(
+            document_class=document_class,
+            filter_conditions=filter_conditions,
+            id=id,
+            paginated=paginated,
+            sort=sort,
+            with_total=with_total,
+            count_limit=count_limit,
+            cursor=cursor,
+            fields=fields,
+            tenant=tenant,
+        )
+        collection = self.collection(document_class)
+        if with_total:
+            facet = await collection.aggregate(pipeline).to_list(length=1)
+            items, total = self._read_facet(facet[0] if facet else None)
+        else:
+            count_pipeline = self._count_pipeline(document_class, filter_conditions, id, tenant, count_limit)
+            items, counted = await asyncio.gather(
+                collection.aggregate(pipeline).to_list(length=None),
+                collection.aggregate(count_pipeline).to_list(length=1),
+            )
+            total = counted[0]["total"] if counted else 0
+        if cursor is None:
+            return [document_class._from_son(item) for item in items], total
+        _skip, limit = self._page_bounds(paginated)
+        keys = DocumentKeysetPagination.sort_keys(self._sort_ordering(sort))
+        items, next_cursor = DocumentKeysetPagination.page(items, keys, limit or self.DEFAULT_PAGE_SIZE)
+        return [document_class._from_son(item) for item in items], total, next_cursor
+
+    def _fields_projection(self, document_class, fields: list) -> dict:
+        # Without a queryset, that would need a mongoengine connection
+        return {document_class._translate_field_name(field): 1 for field in fields}
+
+    async def add_or_remove_document_relations(
+        self,
+        context,
+        document,
+        exsitent_relations_list,
+        new_relations_list,
+        attribute_search,
+        request_context,
+        element_name,
+        element_relation_name,
+        multiple_params=False,
+        params_multiple: tuple = None,
+    ):
+        """
+        Processes the relations to remove and add, see `DatabaseManager.add_or_remove_document_relations`.
+        Procesa las relaciones a eliminar y agregar.
+        """
+        relations_list = set([x.__getattribute__(attribute_search) for x in exsitent_relations_list])
+        set_new_relations_list = set(
+            new_relations_list if multiple_params is False else [x["code"] for x in new_relations_list]
+        )
+
+        if multiple_params:
+            add_relations_list = [item for item in new_relations_list if item["code"] not in relations_list]
+            remove_relations_list = [
+                item for item in exsitent_relations_list if item.code not in set_new_relations_list
+            ]
+            remove_relations_list = [
+                {key: getattr(item, key) for key in params_multiple} for item in remove_relations_list
+            ]
+        else:
+            add_relations_list = list(set_new_relations_list - relations_list)
+            remove_relations_list = list(relations_list - set_new_relations_list)
+
+        result_list = await self.remove_document_relations(
+            context,
+            document,
+            remove_relations_list,
+            exsitent_relations_list,
+            attribute_search,
+            request_context,
+            element_name,
+            element_relation_name,
+            multiple_params,
+        )
+        result_list = await self.add_document_relations(
+            context,
+            document,
+            add_relations_list,
+            result_list,
+            attribute_search,
+            request_context,
+            element_name,
+            element_relation_name,
+            multiple_params,
+        )
+        return result_list
+
+    async def remove_document_relations(
+        self,
+        context,
+        document,
+        list_elements,
+        list_registers,
+        attribute_search,
+        request_context,
+        element_name,
+        element_relation_name,
+        multiple_params=False,
+    ):
+        """
+        Removes the registers of `list_elements`, see `DatabaseManager.remove_document_relations`.
+        Elimina de list_registers los elementos definidos en list_elements.
+        """
+        for element in list_elements:
+            register = await self.get_register(
+                attribute_search, context, document, element, request_context, multiple_params
+            )
+            if register not in list_registers:
+                raise NotFoundError(message=f"{element_name} {element} not defined in {element_relation_name}")
+            list_registers.remove(register)
+
+        return list_registers
+
+    async def add_document_relations(
+        self,
+        context,
+        document,
+        list_elements,
+        list_registers,
+        attribute_search,
+        request_context,
+        element_name,
+        element_relation_name,
+        multiple_params=False,
+    ):
+        """
+        Adds the registers of `list_elements`, see `DatabaseManager.add_document_relations`.
+        Agrega a list_registers los elementos definidos en list_elements.
+        """
+        for element in list_elements:
+            register = await self.get_register(
+                attribute_search, context, document, element, request_context, multiple_params
+            )
+            if not register:
+                raise NotFoundError(message=f"{element_name} {element} not found")
+            if register in list_registers:
+                raise AlreadyExistError(message=f"{element_name} {element} already added in {element_relation_name}")
+            list_registers.append(register)
+
+        return list_registers
+
+    async def get_register(self, attribute_search, context, document, element, request_context, multiple_params):
+        """
+        Gets a register by id or by the search params from the database of the manager, see
+        `DatabaseManager.get_register`. A missing register is synchronized with `get_or_sync` in a worker
+        thread, with the document switched to the tenant alias `context.db_name`.
+        Obtiene el registro por id o por los parámetros de búsqueda de la base de datos del manager. Un
+        registro que no existe se sincroniza con `get_or_sync` en un hilo, sobre el alias del tenant.
+        """
+        params = element if multiple_params else {attribute_search: element}
+        register = await self.get_document(context.db_name, request_context.get("tenant"), document, **params)
+        if register is not None or attribute_search == "id":
+            return register
+        return await asyncio.to_thread(self._get_or_sync, context.db_name, document, request_context, params)
+
+    @classmethod
+    def _get_or_sync(cls, db_alias: str, document, request_context, params: dict):
+        # switch_db re-points the document class for the whole process, so the threads of other tenants
+        # wait until the class is switched back
+        with cls._switch_lock, switch_db(document, db_alias) as tenant_document:
+            return tenant_document.get_or_sync(request_context, **params)
+
+    async def read_response(
+        self,
+        request,
+        context,
+        document_class,
+        message_response: MessageResponse,
+        msg_success: str,
+        msg_exception: str,
+        entry_field_name: str,
+        count_strategy: DocumentCountStrategy = DocumentCountStrategy.EXACT,
+        cursor: str = None,
+        **kwargs,
+    ):
+        """
+        Lists the documents of a read request, see `DatabaseManager.read_response`.
+        """
+        try:
+            cursor = keyset_cursor(cursor)
+            data = DBUtil.db_prepared_statement(
+                request.id,
+                request.fields,
+                request.filter,
+                request.paginated,
+                None,
+                request.sort_by,
+            )
+            result = await self.list_documents(
+                context.db_name,
+                request.context.tenant,
+                document_class,
+                **data,
+                count_strategy=count_strategy,
+                cursor=cursor,
+            )
+            list_docs, total = result[:2]
+            kwargs_return = {
+                f"{entry_field_name}": [doc.to_proto() for doc in list_docs],
+            } | kwargs
+            if cursor is not None and "next_cursor" in message_response.cls.DESCRIPTOR.fields_by_name:
+                kwargs_return["next_cursor"] = result[2] or ""
+            return message_response.fetched_response(
+                message=msg_success,
+                total=total,
+                count=len(list_docs),
+                id=request.id,
+                paginated=request.paginated,
+                **kwargs_return,
+            )
+        except ValueError as e:
+            LoggerTraceback.error("Input request data validation error", e, logger)
+            return message_response.input_validator_response(message=str(e))
+        except Exception as e:
+            LoggerTraceback.error(msg_exception, e, logger)
+            return message_response.internal_response(message=msg_exception)
+
+    async def _find_by_id(self, document_class, id):
+        son = await self.collection(document_class).find_one({"_id": ObjectId(id) if isinstance(id, str) else id})
+        return document_class._from_son(son) if son else None
+
+    @staticmethod
+    def _stamp(document):
+        # Same defaults as BaseDocument.save, which is not called
+        context_field, audit_field = document._fields.get("context"), document._fields.get("audit")
+        if context_field and not document.context:
+            document.context = context_field.document_type()
+        if audit_field:
+            user = document.context.user if context_field else None
+            if not document.audit:
+                document.audit = audit_field.document_type(created_by=user)
+            document.audit.updated_by = user
+            document.audit.updated_at = datetime.utcnow()
+
+    @staticmethod
+    def _record(document, action: str, changed_fields: set = None):
+        """
+        Adds the change to the CRUD attributes of the current `AsyncExitStackDocument`, as the
+        post_save and post_delete signals of `BaseDocument` do for the synchronous manager.
+        """
+        stack = current_document_stack.get()
+        if stack is None or not Config.PROCESS_WEBHOOK or getattr(document, "__is_replic_table__", False):
+            return
+        if not hasattr(document, "assign_crud_attrs_to_stack"):
+            return
+        document.created_attrs = stack.created_attrs
+        document.updated_attrs = stack.updated_attrs
+        document.deleted_attrs = stack.deleted_attrs
+        document.assign_crud_attrs_to_stack(action, changed_fields)
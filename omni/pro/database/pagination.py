@@ -0,0 +1,14 @@
+# Token of the first page of a keyset listing, the same for Postgres, Mongo and the mirror model service.
+# None and "", the value of an unset proto string, mean offset pagination.
+FIRST_PAGE = "first"
+
+
+def keyset_cursor(cursor: str = None) -> str:
+    """
+    Returns the keyset pagination token of a request, None when keyset pagination is not requested.
+    """
+    return cursor or None
+
+
+def is_first_page(cursor: str) -> bool:
+    return cursor == FIRST_PAGE
@@ -0,0 +1,301 @@
+import asyncio
+import threading
+import time
+from typing import Dict
+
+from omni.pro.database.postgres import (
+    CountStrategy,
+    CustomSession,
+    EngineRegistry,
+    PostgresDatabaseManager,
+    SessionManager,
+    SessionRoute,
+)
+from omni_pro_grpc.common import base_pb2
+from sqlalchemy.ext.asyncio import AsyncSession, async_scoped_session, async_sessionmaker
+
+
+class AsyncSessionManager:
+    """
+    asyncio counterpart of `SessionManager`, with one `AsyncSession` per task instead of per thread.
+    Contraparte asyncio de `SessionManager`, con una `AsyncSession` por tarea en lugar de por hilo.
+
+    Example:
+        manager = AsyncPostgresDatabaseManager(**db_params)
+        async with manager as session:
+            record = await manager.create_new_record(Model, session, **values)
+    """
+
+    max_replica_lag: float = SessionManager.max_replica_lag
+    replica_lag_ttl: float = SessionManager.replica_lag_ttl
+
+    _replica_lag: Dict[str, tuple] = {}
+    _replica_lag_lock = threading.Lock()
+
+    def __init__(self, base_url, read_url=None):
+        self.base_url = base_url
+        self.read_url = read_url
+        self.engine = EngineRegistry.get_async_engine(self.base_url)
+        # Objects stay loaded after commit, refreshing them would need IO outside of an await
+        self.session_factory = async_sessionmaker(
+            bind=self.engine, class_=AsyncSession, sync_session_class=CustomSession, expire_on_commit=False
+        )
+        self.Session = async_scoped_session(self.session_factory, scopefunc=asyncio.current_task)
+        if read_url and read_url != base_url:
+            self.read_engine = EngineRegistry.get_async_engine(read_url)
+            self.ReadSession = async_scoped_session(
+                async_sessionmaker(
+                    bind=self.read_engine, class_=AsyncSession, sync_session_class=CustomSession, expire_on_commit=False
+                ),
+                scopefunc=asyncio.current_task,
+            )
+        else:
+            self.read_engine = self.engine
+            self.ReadSession = self.Session
+
+    async def __aenter__(self):
+        # Esto dará una sesión específica para la tarea actual
+        session = self.Session()
+        return session
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        # Cuando el contexto se cierra, la sesión se confirma y los atributos CRUD pasan a los webhooks.
+
+        if exc_tb is None:
+            await self.Session.commit()
+        else:
+            await self.Session.rollback()
+        await self.Session.remove()
+        if self.ReadSession is not self.Session:
+            await self.ReadSession.remove()
+
+    def _pull_crud_attrs(self, session: AsyncSession = None):
+        """
+        Hands the CRUD attributes of the session to the webhooks, see `SessionManager._pull_crud_attrs`.
+        """
+        (session or self.Session()).sync_session.dispatch_crud_attrs()
+
+    async def session_for(self, route=SessionRoute.WRITE, max_staleness: float = None) -> AsyncSession:
+        """
+        Returns the session of a route, see `SessionManager.session_for`.
+        Retorna la sesión del enrutamiento indicado, ver `SessionManager.session_for`.
+        """
+        if SessionRoute(route) == SessionRoute.WRITE or self.ReadSession is self.Session:
+            return self.Session()
+        if max_staleness is None:
+            max_staleness = self.max_replica_lag
+        if max_staleness == 0 or (max_staleness is not None and await self.replica_lag() > max_staleness):
+            return self.Session()
+        return self.ReadSession()
+
+    async def replica_lag(self) -> float:
+        """
+        Seconds the read replica is behind the primary, see `SessionManager.replica_lag`.
+        """
+        now = time.monotonic()
+        with self._replica_lag_lock:
+            measured_at, lag = self._replica_lag.get(self.read_url, (None, None))
+        if measured_at is not None and now - measured_at < self.replica_lag_ttl:
+            return lag
+        try:
+            async with self.read_engine.connect() as connection:
+                lag = (
+                    await connection.exec_driver_sql(
+                        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                    )
+                ).scalar()
+            lag = float(lag or 0)
+        except Exception:
+            lag = float("inf")
+        with self._replica_lag_lock:
+            self._replica_lag[self.read_url] = (now, lag)
+        return lag
+
+
+class _RecordOperations(PostgresDatabaseManager):
+    """
+    The record operations of `PostgresDatabaseManager` without engines of their own.
+    They run on the sync session of an `AsyncSession` through `run_sync`.
+    """
+
+    def __init__(self):
+        pass
+
+
+class AsyncPostgresDatabaseManager(AsyncSessionManager):
+    """
+    Handles Postgres operations with SQLAlchemy asyncio and asyncpg, for `grpc.aio` servicers.
+    Maneja operaciones de Postgres con SQLAlchemy asyncio y asyncpg, para servicers de `grpc.aio`.
+
+    Methods mirror `PostgresDatabaseManager` as coroutines and keep its filter, projection, pagination
+    and count logic, which runs on the sync session of the `AsyncSession` through `run_sync`. Relationships
+    not loaded by the query must not be accessed outside of it, lazy loads need IO.
+
+    Args:
+    name (str): Name of the database.
+                Nombre de la base de datos.
+    host (str): Host of the database.
+                Host de la base de datos.
+    port (str): Port of the database.
+                Puerto de la base de datos.
+    user (str): User to connect to the database.
+                Usuario para conectarse a la base de datos.
+    password (str): Password to connect to the database.
+                    Contraseña para conectarse a la base de datos.
+    read_host (str, optional): Host of the read replica.
+                               Host de la réplica de lectura.
+    read_port (str, optional): Port of the read replica.
+                               Puerto de la réplica de lectura.
+    """
+
+    def __init__(
+        self, name: str, host: str, port: str, user: str, password: str, read_host: str = None, read_port: str = None
+    ):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.base_url = f"postgresql+asyncpg://{user}:{password}@{host}:{port}/{name}"
+        self.read_url = None
+        if read_host:
+            self.read_url = f"postgresql+asyncpg://{user}:{password}@{read_host}:{read_port or port}/{name}"
+        self.records = _RecordOperations()
+        super().__init__(self.base_url, self.read_url)
+
+    async def _run(self, method: str, model, session, *args, **kwargs):
+        if isinstance(session, async_scoped_session):
+            session = session()
+        operation = getattr(self.records, method)
+        return await session.run_sync(lambda sync_session: operation(model, sync_session, *args, **kwargs))
+
+    async def create_new_record(self, model, session, **kwargs):
+        """
+        Creates a new record, see `PostgresDatabaseManager.create_new_record`.
+        Crea un nuevo registro, ver `PostgresDatabaseManager.create_new_record`.
+        """
+        return await self._run("create_new_record", model, session, **kwargs)
+
+    async def retrieve_record(self, model, session, filters):
+        """
+        Retrieves the first record matching the filters, see `PostgresDatabaseManager.retrieve_record`.
+        Recupera el primer registro que cumple los filtros, ver `PostgresDatabaseManager.retrieve_record`.
+        """
+        return await self._run("retrieve_record", model, session, filters)
+
+    async def retrieve_records(self, model, session, filters: dict, route: SessionRoute = None):
+        """
+        Retrieves the records matching the filters, see `PostgresDatabaseManager.retrieve_records`.
+        Recupera los registros que cumplen los filtros, ver `PostgresDatabaseManager.retrieve_records`.
+        """
+        if route is not None:
+            session = await self.session_for(route)
+        return await self._run("retrieve_records", model, session, filters)
+
+    async def retrieve_record_by_id(self, model, session, id: int):
+        """
+        Retrieves a single record by its ID.
+        Recupera un único registro por su ID.
+        """
+        return await self._run("retrieve_record_by_id", model, session, id)
+
+    async def list_records(
+        self,
+        model,
+        session,
+        id: int,
+        fields: base_pb2.Fields,
+        filter: base_pb2.Filter,
+        group_by: base_pb2.GroupBy,
+        sort_by: base_pb2.SortBy,
+        paginated: base_pb2.Paginated,
+        cursor: str = None,
+        count_strategy: CountStrategy = CountStrategy.EXACT,
+        route: SessionRoute = None,
+    ):
+        """
+        Lists records, see `PostgresDatabaseManager.list_records`.
+        Lista registros, ver `PostgresDatabaseManager.list_records`.
+        """
+        return await self.fetch_records(
+            model,
+            session,
+            id,
+            fields,
+            filter,
+            group_by,
+            sort_by,
+            paginated,
+            cursor=cursor,
+            count_strategy=count_strategy,
+            route=route,
+        )
+
+    async def fetch_records(
+        self,
+        model,
+        session,
+        id: int = None,
+        fields: list[str] = None,
+        filter: dict = None,
+        group_by: list[str] = None,
+        sort_by: list[dict] = None,
+        paginated: dict = None,
+        cursor: str = None,
+        count_strategy: CountStrategy = CountStrategy.EXACT,
+        route: SessionRoute = None,
+    ):
+        """
+        Lists records with their total, see `PostgresDatabaseManager.fetch_records`.
+        Lista registros con su total, ver `PostgresDatabaseManager.fetch_records`.
+        """
+        if route is not None:
+            session = await self.session_for(route)
+        return await self._run(
+            "fetch_records",
+            model,
+            session,
+            id,
+            fields,
+            filter,
+            group_by,
+            sort_by,
+            paginated,
+            cursor=cursor,
+            count_strategy=count_strategy,
+        )
+
+    async def update_record(self, model, session, model_id, update_dict):
+        """
+        Updates a record by its ID, see `PostgresDatabaseManager.update_record`.
+        Actualiza un registro por su ID, ver `PostgresDatabaseManager.update_record`.
+        """
+        return await self._run("update_record", model, session, model_id, update_dict)
+
+    async def delete_record_by_id(self, model, session, model_id):
+        """
+        Deletes a record by its ID, see `PostgresDatabaseManager.delete_record_by_id`.
+        Elimina un registro por su ID, ver `PostgresDatabaseManager.delete_record_by_id`.
+        """
+        return await self._run("delete_record_by_id", model, session, model_id)
+
+    async def upsert_records(self, model, session, data: dict, chunk_size: int = None) -> dict:
+        """
+        Upserts records by `external_id`, see `PostgresDatabaseManager.upsert_records`.
+        Inserta o actualiza registros por `external_id`, ver `PostgresDatabaseManager.upsert_records`.
+        """
+        return await self._run("upsert_records", model, session, data, chunk_size)
+
+    async def batch_upsert(self, model, session, data: list):
+        """
+        Batch upserts and commits, see `PostgresDatabaseManager.batch_upsert`.
+        Actualiza por lotes y confirma, ver `PostgresDatabaseManager.batch_upsert`.
+
+        Returns:
+        (list): A list of records that were not upserted.
+                Una lista de registros que no fueron actualizados.
+        """
+        result = await self.upsert_records(model, session, data)
+        await session.commit()
+        return PostgresDatabaseManager._not_upserted(model, data, result)
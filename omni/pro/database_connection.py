@@ -1,5 +1,6 @@
 import mongoengine as mongo
 from omni.pro.config import Config
+from omni.pro.database.mongo import CollectionCache, MongoClientRegistry
 from omni.pro.logger import configure_logger
 from omni.pro.redis import RedisManager
 
@@ -8,7 +9,7 @@ logger = configure_logger(name=__name__)
 
 def register_logger_connection(tenant, manager: RedisManager):
     conn = manager.get_mongodb_config(Config.LOGGER_ID, tenant)
-    mongo.register_connection(
+    MongoClientRegistry.register(
         alias=f"{tenant}_{conn['name']}",
         name=conn["name"],
         host=conn["host"],
@@ -35,7 +36,7 @@ def ms_register_connection(logger_oms=False):
         if not all(eval_conn.values()):
             continue
 
-        mongo.register_connection(
+        MongoClientRegistry.register(
             alias=f"{tenant}_{conn['name']}",
             name=conn["name"],
             host=conn["host"],
@@ -45,11 +46,16 @@ def ms_register_connection(logger_oms=False):
             **conn["complement"],
         )
 
+        try:
+            CollectionCache.warm(f"{tenant}_{conn['name']}")
+        except Exception as e:
+            logger.warning(f"Collections of tenant {tenant} not cached: {e}")
+
         if logger_oms:
             register_logger_connection(tenant, manager)
 
         if idx == 0:
-            mongo.register_connection(
+            MongoClientRegistry.register(
                 alias=mongo.DEFAULT_CONNECTION_NAME,
                 name=mongo.DEFAULT_CONNECTION_NAME,
                 host=conn["host"],
@@ -1,3 +1,4 @@
+import asyncio
 import re
 import threading
 import time
@@ -7,7 +8,12 @@ from queue import Empty, Queue
 from newrelic.api.function_trace import function_trace
 from omni.pro.aws import AWSCognitoClient, AWSS3Client
 from omni.pro.config import Config
-from omni.pro.database import DatabaseManager, PostgresDatabaseManager
+from omni.pro.database import (
+    AsyncDatabaseManager,
+    AsyncPostgresDatabaseManager,
+    DatabaseManager,
+    PostgresDatabaseManager,
+)
 from omni.pro.logger import LoggerTraceback, configure_logger
 from omni.pro.redis import RedisManager
 from omni.pro.response import MessageResponse
@@ -32,28 +38,7 @@ def resources_decorator(
                     host=Config.REDIS_HOST, port=Config.REDIS_PORT, db=Config.REDIS_DB, redis_ssl=Config.REDIS_SSL
                 )
                 context.redis_manager = redis_manager
-                if Resource.AWS_COGNITO in resource_list:
-                    cognito_params = redis_manager.get_aws_cognito_config(Config.SERVICE_ID, request.context.tenant)
-                    # logger.info(f"Cognito params: {cognito_params}")
-                    context.cognito_client = AWSCognitoClient(**cognito_params)
-                if Resource.AWS_S3 in resource_list:
-                    s3_params = redis_manager.get_aws_s3_config(Config.SERVICE_ID, request.context.tenant)
-                    # logger.info(f"S3 params: {s3_params}")
-                    context.s3_client = AWSS3Client(**s3_params)
-                if Resource.MONGODB in resource_list:
-                    # logger.info(f"Tenant: {request.context.tenant}, Service ID: {Config.SERVICE_ID}")
-                    db_params = redis_manager.get_mongodb_config(Config.SERVICE_ID, request.context.tenant)
-                    context.db_name = f"{request.context.tenant}_{db_params.get('name')}"
-                    db_params["db"] = db_params.pop("name")
-                    # logger.info(f"MongoDB params: {db_params}")
-                    context.db_manager = DatabaseManager(**db_params)
-                if Resource.POSTGRES in resource_list:
-                    # logger.info(f"Tenant: {request.context.tenant}, Service ID: {Config.SERVICE_ID}")
-                    db_params = redis_manager.get_postgres_config(Config.SERVICE_ID, request.context.tenant)
-                    context.db_name = db_params.get("name")
-                    context.pg_db_params = db_params
-                    # logger.info(f"Postgres params: {db_params}")
-                    context.pg_manager = PostgresDatabaseManager(**db_params)
+                set_resources(redis_manager, resource_list, request, context, DatabaseManager, PostgresDatabaseManager)
             except Exception as e:
                 LoggerTraceback.error("Resource Decorator exception", e, logger)
             if not request.context.user == INTERNAL_USER:
@@ -70,6 +55,98 @@ def resources_decorator(
     return decorador_func
 
 
+def async_resources_decorator(
+    resource_list: list, permission: bool = True, message_response=None, permission_code: str = None
+) -> callable:
+    """
+    `resources_decorator` for the coroutine methods of `grpc.aio` servicers. The context, wrapped in an
+    `AsyncServicerContext`, gets an `AsyncDatabaseManager` and an `AsyncPostgresDatabaseManager`, and the
+    Redis lookups of the tenant configuration and of the permissions run in a worker thread so they do not
+    block the event loop.
+
+    Example:
+        @async_resources_decorator([Resource.POSTGRES])
+        async def ProductRead(self, request, context):
+            async with context.pg_manager as session:
+                ...
+    """
+
+    def decorador_func(funcion: callable) -> callable:
+        @function_trace(name=funcion.__name__)
+        @wraps(funcion)
+        async def inner(instance, request, context):
+            context = AsyncServicerContext(context)
+            try:
+                redis_manager = RedisManager(
+                    host=Config.REDIS_HOST, port=Config.REDIS_PORT, db=Config.REDIS_DB, redis_ssl=Config.REDIS_SSL
+                )
+                context.redis_manager = redis_manager
+                await asyncio.to_thread(
+                    set_resources,
+                    redis_manager,
+                    resource_list,
+                    request,
+                    context,
+                    AsyncDatabaseManager,
+                    AsyncPostgresDatabaseManager,
+                )
+            except Exception as e:
+                LoggerTraceback.error("Resource Decorator exception", e, logger)
+            if not request.context.user == INTERNAL_USER:
+                if permission:
+                    message_responses = message_response or funcion.__annotations__.get("return")
+                    result = await asyncio.to_thread(
+                        permission_required, redis_manager, request, funcion, message_responses, permission_code
+                    )
+                    if result:
+                        return result
+            return await funcion(instance, request, context)
+
+        return inner
+
+    return decorador_func
+
+
+class AsyncServicerContext:
+    """
+    Wraps a `grpc.aio` servicer context, which does not take new attributes, so the resources can be set on
+    it like on a sync context. Everything else is delegated to the wrapped context.
+    """
+
+    def __init__(self, context):
+        self._context = context
+
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+
+
+def set_resources(
+    redis_manager: RedisManager, resource_list: list, request, context, mongo_manager_class, postgres_manager_class
+):
+    if Resource.AWS_COGNITO in resource_list:
+        cognito_params = redis_manager.get_aws_cognito_config(Config.SERVICE_ID, request.context.tenant)
+        # logger.info(f"Cognito params: {cognito_params}")
+        context.cognito_client = AWSCognitoClient(**cognito_params)
+    if Resource.AWS_S3 in resource_list:
+        s3_params = redis_manager.get_aws_s3_config(Config.SERVICE_ID, request.context.tenant)
+        # logger.info(f"S3 params: {s3_params}")
+        context.s3_client = AWSS3Client(**s3_params)
+    if Resource.MONGODB in resource_list:
+        # logger.info(f"Tenant: {request.context.tenant}, Service ID: {Config.SERVICE_ID}")
+        db_params = redis_manager.get_mongodb_config(Config.SERVICE_ID, request.context.tenant)
+        context.db_name = f"{request.context.tenant}_{db_params.get('name')}"
+        db_params["db"] = db_params.pop("name")
+        # logger.info(f"MongoDB params: {db_params}")
+        context.db_manager = mongo_manager_class(**db_params)
+    if Resource.POSTGRES in resource_list:
+        # logger.info(f"Tenant: {request.context.tenant}, Service ID: {Config.SERVICE_ID}")
+        db_params = redis_manager.get_postgres_config(Config.SERVICE_ID, request.context.tenant)
+        context.db_name = db_params.get("name")
+        context.pg_db_params = db_params
+        # logger.info(f"Postgres params: {db_params}")
+        context.pg_manager = postgres_manager_class(**db_params)
+
+
 def permission_required(rm: RedisManager, request, funcion: callable, message_response, permission_code: str):
     try:
         permission = permission_code or convert_name_upper_snake_case(funcion.__name__)
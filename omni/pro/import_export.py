@@ -3,6 +3,7 @@ from datetime import datetime
 from importlib import import_module
 
 from dateutil import parser
+from omni.pro.database import SessionRoute
 from sqlalchemy import inspect, text
 
 
@@ -20,6 +21,8 @@ class ImportExportBase:
 
 
 class QueryExport(ImportExportBase):
+    STREAM_BATCH_SIZE = 1000
+
     def __init__(self, context: dict):
         """
         Initializes the QueryExport instance.
@@ -42,7 +45,8 @@ class QueryExport(ImportExportBase):
         date_init(datetime): The start date for the query.
         date_finish(datetime): The end date for the query.
         context (dict): The context for the database operation.
-        Returns: The fetched data.
+        Returns: An iterator over the fetched records, to be consumed once, so exports of any size run in
+        constant memory.
         """
         model = self.get_model(model_path)
         return self.db_types[self.db_type](model, model_path, fields, date_init, date_finish, context)
@@ -65,7 +69,7 @@ class QueryExport(ImportExportBase):
         date_init(datetime): The start date for the query.
         date_finish(datetime): The end date for the query.
         context (dict): The context for the NoSQL database operation.
-        Returns: Data retrieved from the NoSQL database.
+        Returns: A cursor over the documents retrieved from the NoSQL database.
         """
         exclude = {"_id" if key == "id" else key: False for key in set(model._fields.keys()) - set(fields)}
         db = model.db
@@ -76,12 +80,12 @@ class QueryExport(ImportExportBase):
                 "$lte": self.parse_date(end_date),
             },
         }
-        cursor = db[model._meta["collection"]].find(
+        # The cursor is returned as is, documents are fetched in batches while it is iterated
+        return db[model._meta["collection"]].find(
             query_filter,
             projection=exclude,
+            batch_size=self.STREAM_BATCH_SIZE,
         )
-        result = list(cursor)
-        return result
 
     def get_data_sql(self, model, model_path, fields, start_date, end_date, context) -> list:
         """
@@ -94,10 +98,10 @@ class QueryExport(ImportExportBase):
             end_date (str): The end date for the query in 'YYYY-MM-DD' format.
             context (dict): Additional context for the query.
         Returns:
-            list: A list of records retrieved from the database.
+            iterator: The records retrieved from the database, streamed in constant memory.
         """
 
-        return DynamicQueryPostgresService(self.context.pg_manager).get_data_sql(
+        return DynamicQueryPostgresService(self.context.pg_manager).iter_data_sql(
             model, fields, start_date, end_date, context
         )
 
@@ -311,6 +315,21 @@ class DynamicQueryPostgresService:
         Returns:
             list: A list of dictionaries representing the retrieved data, grouped by the primary key of the main table.
         """
+        return list(self.iter_data_sql(model, fields, start_date, end_date, context))
+
+    def iter_data_sql(self, model, fields, start_date, end_date, context):
+        """
+        Streams the records of `get_data_sql` in constant memory. Rows are read through a server-side cursor
+        ordered by the primary key of the main table, and each record is yielded once its last row is read.
+        Args:
+            model (Base): The SQLAlchemy model class to query.
+            fields (list): List of fields to retrieve, including nested fields.
+            start_date (datetime): The start date for the date range filter.
+            end_date (datetime): The end date for the date range filter.
+            context (dict): Additional context for the query, including tenant information.
+        Yields:
+            dict: The data of one record of the main table.
+        """
         # Parse nested fields
         nested_fields = self.parse_nested_fields(model, fields)
 
@@ -320,9 +339,11 @@ class DynamicQueryPostgresService:
             model, nested_fields, alias_prefix="main"
         )
 
+        # The rows of a record are grouped by the primary key, selected even when it is not requested
+        main_pk_col = list(inspect(model).primary_key)[0].name
+        group_alias = "main__group_pk"
+        columns_select.append(f'main."{main_pk_col}" AS {group_alias}')
         select_clause = ",\n    ".join(columns_select)
-        if not select_clause:
-            select_clause = "1"  # Prevent empty SELECT clause
 
         sql_query = f"""
         SELECT
@@ -331,53 +352,57 @@ class DynamicQueryPostgresService:
             {' '.join(join_clauses)}
         WHERE main."tenant" = :tenant
           AND main."created_at" BETWEEN :start_date AND :end_date
+        ORDER BY main."{main_pk_col}"
         """
-        # Execute the query
-        result = self.pg_manager.Session.execute(
-            text(sql_query),
+        # Execute the query, exports are served by the read replica when the tenant has one
+        result = self.pg_manager.session_for(SessionRoute.READ).execute(
+            text(sql_query).execution_options(yield_per=self.pg_manager.STREAM_BATCH_SIZE),
             {
                 "tenant": context["tenant"],
                 "start_date": start_date,
                 "end_date": end_date,
             },
         )
-        rows = result.fetchall()
-        main_pk_col = list(inspect(model).primary_key)[0].name
-        main_pk_alias = f"main_{main_pk_col}"
 
-        grouped_data = {}
-        for row in rows:
+        record, record_id = None, None
+        for row in result:
             row_dict = dict(row._mapping)
-            main_id_value = row_dict.get(main_pk_alias)
+            main_id_value = row_dict.pop(group_alias)
 
-            if main_id_value not in grouped_data:
-                grouped_data[main_id_value] = self._build_base_dict(row_dict, nested_mapping)
+            if record is None or main_id_value != record_id:
+                if record is not None:
+                    yield record
+                record, record_id = self._build_base_dict(row_dict, nested_mapping), main_id_value
 
-            for rel_name, info in nested_mapping.items():
-                if isinstance(info, dict):
-                    sub_map = info.get("_mapping", {})
-                    sub_dict = self._build_nested_dict(row_dict, sub_map)
+            self._merge_row(record, row_dict, nested_mapping)
 
-                    if info.get("_uselist"):
-                        existing_list = grouped_data[main_id_value][rel_name]
-                        found = False
-                        for idx, existing_item in enumerate(existing_list):
-                            if self._compare_items(existing_item, sub_dict, sub_map):
-                                merged_item = self._merge_nested_dicts(existing_item, sub_dict, sub_map)
-                                existing_list[idx] = merged_item
-                                found = True
-                                break
-                        if not found:
-                            existing_list.append(sub_dict)
-                    else:
-                        existing_item = grouped_data[main_id_value].get(rel_name, {})
-                        if existing_item:
-                            merged_item = self._merge_nested_dicts(existing_item, sub_dict, sub_map)
-                            grouped_data[main_id_value][rel_name] = merged_item
-                        else:
-                            grouped_data[main_id_value][rel_name] = sub_dict
+        if record is not None:
+            yield record
+
+    def _merge_row(self, record: dict, row_dict: dict, nested_mapping: dict):
+        for rel_name, info in nested_mapping.items():
+            if isinstance(info, dict):
+                sub_map = info.get("_mapping", {})
+                sub_dict = self._build_nested_dict(row_dict, sub_map)
 
-        return list(grouped_data.values())
+                if info.get("_uselist"):
+                    existing_list = record[rel_name]
+                    found = False
+                    for idx, existing_item in enumerate(existing_list):
+                        if self._compare_items(existing_item, sub_dict, sub_map):
+                            merged_item = self._merge_nested_dicts(existing_item, sub_dict, sub_map)
+                            existing_list[idx] = merged_item
+                            found = True
+                            break
+                    if not found:
+                        existing_list.append(sub_dict)
+                else:
+                    existing_item = record.get(rel_name, {})
+                    if existing_item:
+                        merged_item = self._merge_nested_dicts(existing_item, sub_dict, sub_map)
+                        record[rel_name] = merged_item
+                    else:
+                        record[rel_name] = sub_dict
 
     def _merge_nested_dicts(self, existing, new, mapping):
         for key, key_info in mapping.items():
@@ -538,10 +563,10 @@ class BatchUpsert(ImportExportBase):
 
     def upsert_data_sql(self, model, data):
         """
-        Handles the batch upsert operation in a SQL database.
+        Handles the batch upsert operation in a SQL database with INSERT ... ON CONFLICT, and commits it.
         Parameters:
         model: The model class for the SQL operation.
         data (dict): The data to be upserted.
-        Returns: The result of the SQL upsert operation.
+        Returns: The records that were not upserted.
         """
         return self.context.pg_manager.batch_upsert(model, self.context.pg_manager.Session, data)
@@ -6,7 +6,8 @@ from pathlib import Path
 import newrelic.agent
 from bson import ObjectId
 from marshmallow import ValidationError
-from omni.pro.database import DBUtil
+from omni.pro.database import DBUtil, SessionRoute
+from omni.pro.database.pagination import keyset_cursor
 from omni.pro.decorators import resources_decorator
 from omni.pro.exceptions import handle_error
 from omni.pro.logger import LoggerTraceback, configure_logger
@@ -219,10 +220,13 @@ class MirrorModelSQL(MirrorModelBase):
             if type_field == float:
                 type_field = int
             provided_ids = [type_field(item["id"]) for item in items]
-            existing_docs = (
-                self.context.pg_manager.Session.query(self.model).filter(self.model.tenant == self.tenant).all()
-            )
-            existing_ids = [getattr(doc, unique_field_aliasing) for doc in existing_docs]
+            # Only the unique column is needed, streamed so full resyncs do not load every record
+            existing_ids = [
+                value
+                for (value,) in self.context.pg_manager.Session.query(getattr(self.model, unique_field_aliasing))
+                .filter(self.model.tenant == self.tenant)
+                .yield_per(self.context.pg_manager.STREAM_BATCH_SIZE)
+            ]
 
             ids_to_delete = set(existing_ids) - set(provided_ids)
             if ids_to_delete:
@@ -398,6 +402,7 @@ class MirrorModelSQL(MirrorModelBase):
             data.group_by,
             data.sort_by,
             data.paginated,
+            route=SessionRoute.READ,
         )
 
 
@@ -622,19 +627,20 @@ class MirrorModelNoSQL(MirrorModelBase):
                     code_field_aliasing = field.db_field
         return code_field_aliasing
 
-    def read_mirror_model(self, tenant, data):
+    def read_mirror_model(self, tenant, data, cursor: str = None):
         """
         Reads the mirror model using SQL.
 
         Args:
             model (str): The name of the model.
             data (dict): The data to read the model with.
+            cursor (str): Keyset pagination token, see DocumentKeysetPagination.
 
         Returns:
             bool: True if the read was successful, False otherwise.
         """
 
-        return self.context.db_manager.list_documents(None, tenant, self.model, **data)
+        return self.context.db_manager.list_documents(None, tenant, self.model, **data, cursor=cursor)
 
     def delete_mirror_model(self, data):
         """
@@ -748,18 +754,26 @@ class MirrorModelServiceMongo(mirror_model_pb2_grpc.MirrorModelServiceServicer):
                 data = DBUtil.db_prepared_statement(
                     request.id, request.fields, request.filter, request.paginated, None, request.sort_by
                 )
-                result = base.read_mirror_model(request.context.tenant, data)
+                # Keyset pagination when the client sends a token, FIRST_PAGE to start
+                cursor = keyset_cursor(getattr(request, "cursor", ""))
+                result = base.read_mirror_model(request.context.tenant, data, cursor=cursor)
+                if cursor is not None and "next_cursor" in message_response.cls.DESCRIPTOR.fields_by_name:
+                    next_cursor = {"next_cursor": result[2] or ""}
+                else:
+                    next_cursor = {}
                 if request.protobuf:
                     return message_response.created_response(
                         message="Mirror model read successfully",
                         mirror_models=to_list_value(
-                            [MessageToDict(mirror_model.to_proto()) for mirror_model in result]
+                            [MessageToDict(mirror_model.to_proto()) for mirror_model in result[0]]
                         ),
+                        **next_cursor,
                     )
 
                 return message_response.created_response(
                     message="Mirror model read successfully",
                     mirror_models=to_list_value([mirror_model.generate_dict() for mirror_model in result[0]]),
+                    **next_cursor,
                 )
 
         except Exception as e:
@@ -16,6 +16,7 @@ from mongoengine import (
 )
 from omni.pro.airflow.actions import ActionToAirflow
 from omni.pro.config import Config
+from omni.pro.database.mongo import DBUtil
 from omni.pro.database.postgres import CustomSession
 from omni.pro.database.sqlalchemy import mapped_column
 from omni.pro.locales import translator as ts
@@ -97,6 +98,7 @@ class Context(BaseEmbeddedDocument):
 class BaseDocument(Document):
     __is_replic_table__ = False
     __exclude_fields__ = []
+    __indexes__ = []
 
     context = EmbeddedDocumentField(Context, help_text=ts.gettext("Context for the object"))
     audit = EmbeddedDocumentField(Audit, help_text=ts.gettext("Audit for the object"))
@@ -151,7 +153,7 @@ class BaseDocument(Document):
     def update(self, **kwargs):
         res = super().update(**kwargs)
         if kwargs and isinstance(kwargs, dict):
-            self.validate_change_fields(set(kwargs.keys()))
+            self.validate_change_fields(DBUtil.update_fields(kwargs))
         return res
 
     def to_proto(self, fields=set(), exclude=False, message=None, *args, **kwargs):
@@ -169,6 +171,29 @@ class BaseDocument(Document):
     def reference_list(cls):
         return [cls]
 
+    @classmethod
+    def index_declarations(cls) -> list[tuple]:
+        """
+        Indexes the collection needs, as tuples of db field paths: the tenant followed by `external_id`, by
+        each unique `field_aliasing` field and by `audit.created_at`, plus the ones declared in `__indexes__`.
+        """
+        indexes = [("context.tenant", "external_id")]
+        indexes.extend(cls.unique_index_declarations())
+        indexes.append(("context.tenant", "audit.created_at"))
+        indexes.extend(tuple(index) for index in cls.__indexes__)
+        return list(dict.fromkeys(indexes))
+
+    @classmethod
+    def unique_index_declarations(cls) -> list[tuple]:
+        """
+        Declared indexes that must also be unique: the tenant followed by each unique `field_aliasing` field.
+        """
+        return [
+            ("context.tenant", field.db_field)
+            for field in cls._fields.values()
+            if getattr(field, "unique", False) and getattr(field, "field_aliasing", None)
+        ]
+
     @classmethod
     @measure_time
     def post_save(cls, sender, document, **kwargs):
@@ -357,6 +382,7 @@ class Base:
     __properties__ = []
     __click_house__ = True
     __exclude_fields__ = []
+    __indexes__ = []
 
     @staticmethod
     def _camel_to_snake(name):
@@ -382,6 +408,29 @@ class Base:
         """
         return cls._camel_to_snake(cls.__name__)
 
+    @classmethod
+    def index_declarations(cls) -> list[tuple]:
+        """
+        Indexes the table needs, as tuples of column names: `tenant` followed by `external_id`, by each unique
+        `field_aliasing` column and by `created_at`, plus the ones declared in `__indexes__`.
+        """
+        indexes = [("tenant", "external_id")]
+        indexes.extend(cls.unique_index_declarations())
+        indexes.append(("tenant", "created_at"))
+        indexes.extend(tuple(index) for index in cls.__indexes__)
+        return list(dict.fromkeys(indexes))
+
+    @classmethod
+    def unique_index_declarations(cls) -> list[tuple]:
+        """
+        Declared indexes that must also be unique: `tenant` followed by each unique `field_aliasing` column.
+        """
+        return [
+            ("tenant", column.name)
+            for column in cls.__table__.columns
+            if column.unique and getattr(column, "field_aliasing", None)
+        ]
+
     id: Mapped[int] = mapped_column(
         primary_key=True, autoincrement=True, is_importable=False, doc=ts.gettext("Identificaator for the object")
     )
@@ -675,9 +724,18 @@ class Base:
             session.deleted_attrs[model_name].append(instance_id)
 
     def _can_write_crud_attrs(self, mapper) -> bool:
+        values = {key: getattr(self, key) for key in mapper.columns.keys()}
+        return self._can_write_crud_values(values, mapper)
+
+    @classmethod
+    def _can_write_crud_values(cls, values: dict, mapper) -> bool:
+        """
+        Per-row rule of the CRUD attributes, on the column values of the row, so it also applies to the
+        rows written without instances such as `upsert`.
+        """
         table_name = mapper.mapped_table.name
         can_write = True
-        if table_name == "sale" and hasattr(self, "client_id") and not self.client_id:
+        if table_name == "sale" and "client_id" in values and not values["client_id"]:
             can_write = False
         return can_write
 
@@ -1,10 +1,14 @@
+import threading
+
 from google.protobuf import json_format
+from mongoengine import Document
 from omni.pro.airflow.call_register_models import RegisterModels
 from omni.pro.celery.call_register_models import RegisterModels
 from omni.pro.config import Config
-from omni.pro.database import PersistenceTypeEnum
+from omni.pro.database import IndexSync, PersistenceTypeEnum
 from omni.pro.descriptor import Descriptor
 from omni.pro.logger import configure_logger
+from omni.pro.models.base import BaseModel
 from omni.pro.redis import RedisManager
 from omni.pro.topology import Topology
 from omni.pro.user.access import INTERNAL_USER
@@ -41,6 +45,35 @@ class RegisterModel(object):
         """
         self._register("describe_sqlalchemy_model", PersistenceTypeEnum.SQL)
 
+    def sync_indexes(self, create: bool = True) -> threading.Thread:
+        """
+        Syncs the indexes declared by the models in the database of every tenant, see `IndexSync`; the builds
+        run in a daemon thread. With `Config.SYNC_INDEXES` the register methods already sync the indexes of
+        the models they register, otherwise services call it at startup after registering their models.
+
+        Sincroniza los índices declarados por los modelos en la base de datos de cada tenant. Con
+        `Config.SYNC_INDEXES` los métodos de registro ya los sincronizan, de lo contrario los servicios lo
+        llaman al iniciar, después de registrar sus modelos.
+
+        Parameters:
+        ----------
+        create : bool
+            Creates the missing indexes, otherwise they are only reported.
+            Crea los índices que faltan, de lo contrario solo se reportan.
+        """
+        models_libs = self._models()
+        return IndexSync(
+            document_classes=[model for model in models_libs if issubclass(model, Document)],
+            models=[model for model in models_libs if issubclass(model, BaseModel)],
+            create=create,
+        ).start_thread()
+
+    def _models(self) -> list:
+        TopologyClass: Topology = self.get_topology_class()
+        if isinstance(self.models_path, str):
+            return TopologyClass(path_models=self.models_path).get_models_from_libs()
+        return TopologyClass().get_models_from_libs()
+
     def _register(self, method: str, persistence_type: PersistenceTypeEnum):
         """
         Generic method to register models based on persistence type and descriptor method.
@@ -66,11 +99,7 @@ class RegisterModel(object):
         tenans = redis_manager.get_tenant_codes()
         logger.info(f"Running Topology().get_models_from_libs()")
 
-        TopologyClass: Topology = self.get_topology_class()
-        if isinstance(self.models_path, str):
-            models_libs = TopologyClass(path_models=self.models_path).get_models_from_libs()
-        else:
-            models_libs = TopologyClass().get_models_from_libs()
+        models_libs = self._models()
         logger.info(f"Running for loop")
         for tenant in tenans:
             context = {
@@ -90,6 +119,14 @@ class RegisterModel(object):
                     f"Model {desc['class_name']} state {response.state} status {response.status} with id {response.id}"
                 )
 
+        if getattr(Config, "SYNC_INDEXES", False):
+            # Each persistence type syncs the indexes of its own models once they are registered
+            sql = persistence_type == PersistenceTypeEnum.SQL
+            IndexSync(
+                document_classes=[] if sql else [model for model in models_libs if issubclass(model, Document)],
+                models=[model for model in models_libs if issubclass(model, BaseModel)] if sql else [],
+            ).start_thread()
+
     def transform_model_desc(self, model):
         """
         Transform model description from proto message to dictionary.
@@ -1,5 +1,6 @@
-from contextlib import ExitStack
+from contextlib import AsyncExitStack, ExitStack
 from mongoengine import context_managers as ctx_mgr
+from omni.pro.database.mongo_async import current_document_stack
 from omni.pro.topology import Topology
 from typing import Dict, List, Set
 from omni.pro.webhook.webhook_handler import WebhookHandler
@@ -27,7 +28,8 @@ class ExitStackDocument(ExitStack):
 
     def __enter__(self):
         for document_class in self.document_classes:
-            self.__create_collection(document_class)
+            # The collection is created on the first write if missing, see CollectionCache
+            document_class._meta["db_alias"] = self.db_alias
             self.model_classes = self.enter_context(ctx_mgr.switch_db(document_class, self.db_alias))
             document_class.created_attrs = self.created_attrs
             document_class.updated_attrs = self.updated_attrs
@@ -39,20 +41,13 @@ class ExitStackDocument(ExitStack):
             self._pull_crud_attrs()
         return super().__exit__(exc_type, exc_value, traceback)
 
-    def __create_collection(self, document_class):
-        document_class._meta["db_alias"] = self.db_alias
-        db = document_class.db
-        collection_name = document_class._get_collection_name()
-        if collection_name not in db.list_collection_names():
-            db.create_collection(collection_name)
-
     def _pull_crud_attrs(self):
         """
-        Extracts CRUD attributes from the context and initiates a new thread to handle webhooks.
+        Extracts CRUD attributes from the context and queues them for the webhooks.
 
         This method constructs a dictionary containing the `context` and CRUD attributes (created,
         updated, deleted) from the `ExitStackDocument` instance. It then calls
-        `WebhookHandler.start_thread` to process these attributes in a separate thread.
+        `WebhookHandler.start_thread` to queue these attributes in the `WebhookDispatcher`.
 
         Attributes Extracted:
             - `context`: A dictionary containing the context, as provided during initialization.
@@ -61,7 +56,7 @@ class ExitStackDocument(ExitStack):
             - `deleted_attrs`: A dictionary of attributes for deleted documents.
 
         Calls:
-            - `WebhookHandler.start_thread(crud_attrs, context)`: Initiates a new thread to filter events
+            - `WebhookHandler.start_thread(crud_attrs, context)`: Queues the filtering of events
               and webhooks based on the extracted CRUD attributes and context.
         """
 
@@ -74,6 +69,40 @@ class ExitStackDocument(ExitStack):
         WebhookHandler.start_thread(crud_attrs=crud_attrs, context=self.context)
 
 
+class AsyncExitStackDocument(AsyncExitStack):
+    """
+    Asynchronous context of the documents written with `AsyncDatabaseManager`.
+
+    The manager already works on the database of the tenant, so unlike `ExitStackDocument` no document
+    class is switched. The context only collects the created, updated and deleted ids of the current task
+    and hands them to the webhooks on exit.
+
+    For example:
+        async with AsyncExitStackDocument(context=context) as stack:
+            await db_manager.create_document(db_name, DocumentClass1, **values)
+    """
+
+    def __init__(self, context={}, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.created_attrs: Dict[str, List[int]] = {}
+        self.updated_attrs: Dict[str, Dict[str, Set[str]]] = {}
+        self.deleted_attrs: Dict[str, List[int]] = {}
+        self.context: Dict[str, str] = context
+        self._token = None
+
+    async def __aenter__(self):
+        self._token = current_document_stack.set(self)
+        return await super().__aenter__()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        current_document_stack.reset(self._token)
+        if exc_type is None:
+            self._pull_crud_attrs()
+        return await super().__aexit__(exc_type, exc_value, traceback)
+
+    _pull_crud_attrs = ExitStackDocument._pull_crud_attrs
+
+
 class ExitStackDocumentMicro(ExitStackDocument):
     """
     Context manager for dynamic management of an outbound callback stack for user microservice documents.
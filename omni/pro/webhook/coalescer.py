@@ -0,0 +1,176 @@
+import atexit
+import threading
+import time
+from typing import Any, Dict, Set
+
+from omni.pro.logger import configure_logger
+from omni.pro.webhook.dispatcher import WebhookDispatcher
+
+_logger = configure_logger(name=__name__)
+
+
+class _CoalescedChanges(object):
+    """
+    CRUD attributes of several transactions of a tenant merged per model and id.
+
+    A record created in the window is only reported as created, and not at all if it is also deleted.
+    The changed fields of the updates of a record are joined, and an update followed by a delete is
+    only reported as deleted.
+    """
+
+    def __init__(self, deadline: float, context: dict):
+        self.deadline = deadline
+        self.context = context
+        self.created: Dict[str, Dict[Any, None]] = {}
+        self.updated: Dict[str, Dict[Any, Set[str]]] = {}
+        self.deleted: Dict[str, Dict[Any, None]] = {}
+        self.size = 0
+
+    def merge(self, crud_attrs: dict):
+        for model, ids in self._models(crud_attrs.get("created_attrs")):
+            created = self.created.setdefault(model, {})
+            for id in ids:
+                self._add(created, id, None)
+        for model, fields_by_id in self._models(crud_attrs.get("updated_attrs")):
+            created = self.created.get(model, {})
+            updated = self.updated.setdefault(model, {})
+            for id, fields in fields_by_id.items():
+                if id in created:
+                    continue
+                self._add(updated, id, set())
+                updated[id] |= set(fields)
+        for model, ids in self._models(crud_attrs.get("deleted_attrs")):
+            created = self.created.get(model, {})
+            updated = self.updated.get(model, {})
+            deleted = self.deleted.setdefault(model, {})
+            for id in ids:
+                if id in updated:
+                    updated.pop(id)
+                    self.size -= 1
+                if id in created:
+                    created.pop(id)
+                    self.size -= 1
+                    continue
+                self._add(deleted, id, None)
+
+    def crud_attrs(self) -> dict:
+        return dict(
+            created_attrs={model: list(ids) for model, ids in self.created.items() if ids},
+            updated_attrs={model: fields_by_id for model, fields_by_id in self.updated.items() if fields_by_id},
+            deleted_attrs={model: list(ids) for model, ids in self.deleted.items() if ids},
+        )
+
+    def _add(self, ids: dict, id, value):
+        if id not in ids:
+            ids[id] = value
+            self.size += 1
+
+    @staticmethod
+    def _models(attrs: dict):
+        # Skips the "tenant" entry the stacks add next to the models
+        return [(model, ids) for model, ids in (attrs or {}).items() if isinstance(ids, (list, dict))]
+
+
+class WebhookCoalescer(object):
+    """
+    Optional stage in front of `WebhookDispatcher` that merges the CRUD attributes of a tenant over a time
+    window, so a record changed by many transactions in a row is processed by the webhooks once.
+
+    Changes are held for up to `window` seconds after the first one, or until `max_batch` ids are pending,
+    and then dispatched together, see `_CoalescedChanges` for how they are merged. A `window` of 0, the
+    default, disables the stage.
+
+    Example:
+        WebhookCoalescer.configure(window=1.0, max_batch=2000)
+    """
+
+    window: float = 0.0
+    max_batch: int = 1000
+
+    _lock = threading.Condition()
+    _buffers: Dict[tuple, _CoalescedChanges] = {}
+    _flusher: threading.Thread = None
+
+    @classmethod
+    def configure(cls, **kwargs):
+        """
+        Sets the coalescing options.
+
+        Args:
+            **kwargs: Any of `window` in seconds or `max_batch`.
+        """
+        for key, value in kwargs.items():
+            if key not in ("window", "max_batch"):
+                raise ValueError(f"Unknown webhook coalescer option: {key}")
+            setattr(cls, key, value)
+
+    @classmethod
+    def submit(cls, crud_attrs: dict, context: dict) -> bool:
+        """
+        Adds the CRUD attributes of a transaction to the pending changes of its tenant, or hands them to
+        `WebhookDispatcher` right away when coalescing is disabled.
+        """
+        if cls.window <= 0:
+            return WebhookDispatcher.submit(crud_attrs, context)
+        key = (context.get("tenant"), context.get("type_db"))
+        with cls._lock:
+            cls._ensure_flusher()
+            changes = cls._buffers.get(key)
+            if changes is None:
+                changes = cls._buffers[key] = _CoalescedChanges(time.monotonic() + cls.window, context)
+                cls._lock.notify()
+            changes.merge(crud_attrs)
+            changes.context = context
+            if changes.size < cls.max_batch:
+                return True
+            cls._buffers.pop(key)
+        return cls._dispatch(changes)
+
+    @classmethod
+    def flush(cls):
+        """
+        Dispatches every pending change now.
+        """
+        with cls._lock:
+            pending = list(cls._buffers.values())
+            cls._buffers.clear()
+        for changes in pending:
+            cls._dispatch(changes)
+
+    @classmethod
+    def _ensure_flusher(cls):
+        if cls._flusher is not None:
+            return
+        # The dispatcher drains at exit after the pending changes are flushed into it
+        WebhookDispatcher._ensure_started()
+        cls._flusher = threading.Thread(target=cls._run, name="webhook-coalescer", daemon=True)
+        cls._flusher.start()
+        atexit.register(cls.flush)
+
+    @classmethod
+    def _run(cls):
+        while True:
+            with cls._lock:
+                if not cls._buffers:
+                    cls._lock.wait()
+                    continue
+                now = time.monotonic()
+                next_deadline = min(changes.deadline for changes in cls._buffers.values())
+                if next_deadline > now:
+                    cls._lock.wait(next_deadline - now)
+                    continue
+                due = [key for key, changes in cls._buffers.items() if changes.deadline <= now]
+                pending = [cls._buffers.pop(key) for key in due]
+            for changes in pending:
+                cls._dispatch(changes)
+
+    @classmethod
+    def _dispatch(cls, changes: _CoalescedChanges) -> bool:
+        crud_attrs = changes.crud_attrs()
+        if not any(crud_attrs.values()):
+            return True
+        try:
+            return WebhookDispatcher.submit(crud_attrs, dict(changes.context))
+        except Exception as e:
+            _logger.error(f"Webhook coalescer: {str(e)}")
+            return False
@@ -0,0 +1,132 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict
+from urllib.parse import urlsplit
+
+import newrelic.agent as agent
+import requests
+from requests.adapters import HTTPAdapter
+from omni.pro.logger import configure_logger
+from omni_pro_base.http_request import OmniRequest
+
+_logger = configure_logger(name=__name__)
+
+
+class WebhookDelivery(object):
+    """
+    Process-wide engine sending the pages of external webhooks concurrently.
+
+    Every host gets its own pool of `per_host_limit` workers, so a slow partner only delays its own
+    requests, and at most `max_concurrency` requests are in flight across hosts. The latency of each
+    request is recorded in the `Custom/Webhook/Delivery/<host>` metric and in `stats`.
+
+    Webhooks without authentication are sent over the keep-alive `requests.Session` of their host. The
+    others are sent with `OmniRequest.make_request`, which builds their authentication.
+
+    Example:
+        WebhookDelivery.configure(per_host_limit=8, max_concurrency=64)
+        futures = [WebhookDelivery.submit(webhook, page, timeout=10) for page in pages]
+    """
+
+    NO_AUTH = "no_auth"
+
+    per_host_limit: int = 4
+    max_concurrency: int = 32
+
+    _lock = threading.Lock()
+    _executors: Dict[str, ThreadPoolExecutor] = {}
+    _sessions: Dict[str, requests.Session] = {}
+    _semaphore: threading.BoundedSemaphore = None
+    _stats: Dict[str, dict] = {}
+
+    @classmethod
+    def configure(cls, **kwargs):
+        """
+        Sets the delivery options. Call before the first delivery, pools are created then.
+
+        Args:
+            **kwargs: Any of `per_host_limit` or `max_concurrency`.
+        """
+        for key, value in kwargs.items():
+            if key not in ("per_host_limit", "max_concurrency"):
+                raise ValueError(f"Unknown webhook delivery option: {key}")
+            setattr(cls, key, value)
+
+    @classmethod
+    def submit(cls, webhook: dict, records: list, timeout: float) -> Future:
+        """
+        Queues the request of a page of records to the host of the webhook.
+
+        Returns:
+            Future: Resolves to the response, or raises its error, including HTTP error statuses.
+        """
+        url = webhook.get("url")
+        host = urlsplit(url).netloc
+        return cls._executor(host).submit(cls._send, host, webhook, records, timeout)
+
+    @classmethod
+    def stats(cls) -> Dict[str, dict]:
+        """
+        Returns the requests sent and failed per host and their mean latency in seconds.
+        """
+        with cls._lock:
+            return {
+                host: {
+                    "sent": stats["sent"],
+                    "failed": stats["failed"],
+                    "mean_latency": stats["latency"] / stats["sent"] if stats["sent"] else 0.0,
+                }
+                for host, stats in cls._stats.items()
+            }
+
+    @classmethod
+    def _send(cls, host: str, webhook: dict, records: list, timeout: float):
+        with cls._semaphore:
+            started = time.monotonic()
+            try:
+                if webhook.get("auth_type") == cls.NO_AUTH:
+                    response = cls._sessions[host].request(
+                        webhook.get("method"), webhook.get("url"), json=records, timeout=timeout
+                    )
+                else:
+                    response = OmniRequest.make_request(
+                        webhook.get("url"),
+                        webhook.get("method"),
+                        json=records,
+                        tipo_auth=webhook.get("auth_type"),
+                        auth_params=webhook.get("auth"),
+                        timeout=timeout,
+                    )
+                response.raise_for_status()
+            except Exception:
+                cls._record(host, time.monotonic() - started, failed=True)
+                raise
+        cls._record(host, time.monotonic() - started)
+        return response
+
+    @classmethod
+    def _executor(cls, host: str) -> ThreadPoolExecutor:
+        with cls._lock:
+            if cls._semaphore is None:
+                cls._semaphore = threading.BoundedSemaphore(cls.max_concurrency)
+            if host not in cls._executors:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=cls.per_host_limit)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                cls._sessions[host] = session
+                cls._executors[host] = ThreadPoolExecutor(
+                    max_workers=cls.per_host_limit, thread_name_prefix=f"webhook-delivery-{host}"
+                )
+            return cls._executors[host]
+
+    @classmethod
+    def _record(cls, host: str, latency: float, failed: bool = False):
+        agent.record_custom_metric(f"Custom/Webhook/Delivery/{host}", latency)
+        with cls._lock:
+            stats = cls._stats.setdefault(host, {"sent": 0, "failed": 0, "latency": 0.0})
+            stats["sent"] += 1
+            stats["latency"] += latency
+            if failed:
+                stats["failed"] += 1
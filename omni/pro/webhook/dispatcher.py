@@ -0,0 +1,238 @@
+import atexit
+import enum
+import queue
+import threading
+import time
+from typing import Dict, List
+
+import newrelic.agent as agent
+from omni.pro.logger import configure_logger
+from omni.pro.webhook.registry import WebhookRegistry
+
+_logger = configure_logger(name=__name__)
+
+
+class OverflowPolicy(enum.Enum):
+    """
+    What `WebhookDispatcher.submit` does when the queue is full.
+
+    BLOCK: waits up to `WebhookDispatcher.block_timeout` seconds for room, then drops. `submit` runs in the
+        `after_commit` of the session, so the wait stalls the request thread, or the event loop of an
+        async session, that committed. The default.
+    CELERY: hands the CRUD attributes to the Celery task `WebhookDispatcher.spill_task_name`. Choose it
+        only once a worker of the service registers the task with
+        `omni.pro.celery.webhook_tasks.register_webhook_tasks`, otherwise the spilled work is lost.
+    DROP: discards them, counting the drop in the stats and in the `Custom/Webhook/Dropped` metric.
+    """
+
+    BLOCK = "block"
+    CELERY = "celery"
+    DROP = "drop"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class WebhookDispatcher(object):
+    """
+    Process-wide pool of workers running `WebhookHandler.resolve_interface`, fed by a bounded queue.
+
+    Committed sessions and document stacks submit their CRUD attributes instead of starting a thread each,
+    so a burst of writes waits in the queue instead of opening hundreds of threads and connections.
+    Workers start on the first submission and the queue is drained on interpreter exit.
+
+    Example:
+        WebhookDispatcher.configure(workers=8, queue_size=5000, overflow_policy="celery")
+    """
+
+    workers: int = 4
+    queue_size: int = 1000
+    overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK
+    block_timeout: float = 5.0
+    drain_timeout: float = 30.0
+    spill_task_name: str = "process_webhook_crud_attrs"
+    spill_queue: str = "medium"
+
+    _lock = threading.Lock()
+    _queue: queue.Queue = None
+    _threads: List[threading.Thread] = []
+    _closing = False
+    _stats: Dict[str, int] = {"processed": 0, "failed": 0, "dropped": 0, "spilled": 0}
+
+    @classmethod
+    def configure(cls, **kwargs):
+        """
+        Sets the dispatcher options. Call before the first submission, the queue and the workers are
+        created then.
+
+        Args:
+            **kwargs: Any of `workers`, `queue_size`, `overflow_policy`, `block_timeout`, `drain_timeout`,
+                `spill_task_name` or `spill_queue`.
+        """
+        options = ("workers", "queue_size", "block_timeout", "drain_timeout", "spill_task_name", "spill_queue")
+        for key, value in kwargs.items():
+            if key == "overflow_policy":
+                value = OverflowPolicy(value)
+            elif key not in options:
+                raise ValueError(f"Unknown webhook dispatcher option: {key}")
+            setattr(cls, key, value)
+
+    @classmethod
+    def submit(cls, crud_attrs: dict, context: dict) -> bool:
+        """
+        Queues the CRUD attributes of a transaction for the webhooks, applying the overflow policy when the
+        queue is full.
+
+        Returns:
+            bool: True if the attributes were queued or spilled to Celery, False if they were dropped.
+        """
+        cls._ensure_started()
+        item = (time.monotonic(), crud_attrs, context)
+        if cls._closing:
+            return cls._overflow(item, "dispatcher is shutting down")
+        try:
+            if cls.overflow_policy == OverflowPolicy.BLOCK:
+                cls._queue.put(item, timeout=cls.block_timeout)
+            else:
+                cls._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return cls._overflow(item, "queue is full")
+
+    @classmethod
+    def stats(cls) -> dict:
+        """
+        Returns the gauges of the dispatcher: workers alive, queue capacity, depth and age in seconds of
+        the oldest item, and the processed, failed, dropped and spilled counters.
+        """
+        depth, oldest_age = 0, 0.0
+        if cls._queue is not None:
+            with cls._queue.mutex:
+                depth = len(cls._queue.queue)
+                if depth:
+                    oldest_age = time.monotonic() - cls._queue.queue[0][0]
+        with cls._lock:
+            counters = dict(cls._stats)
+            alive = sum(thread.is_alive() for thread in cls._threads)
+        return {"workers": alive, "queue_size": cls.queue_size, "depth": depth, "oldest_age": oldest_age} | counters
+
+    @classmethod
+    def shutdown(cls, timeout: float = None) -> int:
+        """
+        Stops accepting work and waits up to `timeout` seconds, `drain_timeout` by default, for the queued
+        items to be processed.
+
+        Returns:
+            int: The items left in the queue.
+        """
+        with cls._lock:
+            if cls._queue is None or cls._closing:
+                return cls._queue.qsize() if cls._queue is not None else 0
+            cls._closing = True
+            threads = list(cls._threads)
+        deadline = time.monotonic() + (cls.drain_timeout if timeout is None else timeout)
+        for _thread in threads:
+            try:
+                cls._queue.put(None, timeout=max(deadline - time.monotonic(), 0))
+            except queue.Full:
+                break
+        for thread in threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+        left = sum(item is not None for item in list(cls._queue.queue))
+        if left:
+            _logger.warning(f"Webhook dispatcher stopped with {left} pending transactions")
+        return left
+
+    @classmethod
+    def _ensure_started(cls):
+        if cls._queue is not None:
+            return
+        with cls._lock:
+            if cls._queue is not None:
+                return
+            cls._queue = queue.Queue(maxsize=cls.queue_size)
+            cls._threads = [
+                threading.Thread(target=cls._work, name=f"webhook-dispatcher-{idx}", daemon=True)
+                for idx in range(cls.workers)
+            ]
+            for thread in cls._threads:
+                thread.start()
+            atexit.register(cls.shutdown)
+        WebhookRegistry.listen()
+
+    @classmethod
+    def _work(cls):
+        from omni.pro.webhook.webhook_handler import WebhookHandler
+
+        while True:
+            item = cls._queue.get()
+            try:
+                if item is None:
+                    return
+                enqueued_at, crud_attrs, context = item
+                agent.record_custom_metric("Custom/Webhook/QueueAge", time.monotonic() - enqueued_at)
+                WebhookHandler(crud_attrs, context).resolve_interface()
+                cls._count("processed")
+            except Exception as e:
+                cls._count("failed")
+                _logger.error(f"Webhook dispatcher: {str(e)}")
+            finally:
+                cls._queue.task_done()
+
+    @classmethod
+    def _overflow(cls, item: tuple, reason: str) -> bool:
+        _enqueued_at, crud_attrs, context = item
+        if cls.overflow_policy == OverflowPolicy.CELERY and cls._spill(crud_attrs, context):
+            cls._count("spilled")
+            return True
+        cls._count("dropped")
+        agent.record_custom_metric("Custom/Webhook/Dropped", 1)
+        _logger.warning(f"Webhook dispatcher dropped a transaction of {context.get('tenant')}: {reason}")
+        return False
+
+    @staticmethod
+    def dump_spilled(crud_attrs: dict) -> dict:
+        """
+        Returns CRUD attributes the Celery serializer accepts: the changed fields of each id, a set, are sent
+        as [id, fields] pairs, which also keeps the integer ids that JSON object keys would turn into strings.
+        """
+        return {
+            key: {
+                model: [[id, sorted(fields)] for id, fields in ids.items()] if isinstance(ids, dict) else ids
+                for model, ids in attrs.items()
+            }
+            for key, attrs in crud_attrs.items()
+        }
+
+    @staticmethod
+    def load_spilled(payload: dict) -> dict:
+        """
+        Restores the CRUD attributes of `dump_spilled`.
+        """
+        crud_attrs = {key: dict(attrs) for key, attrs in payload.items()}
+        crud_attrs["updated_attrs"] = {
+            model: {id: set(fields) for id, fields in ids} if isinstance(ids, list) else ids
+            for model, ids in payload.get("updated_attrs", {}).items()
+        }
+        return crud_attrs
+
+    @classmethod
+    def _spill(cls, crud_attrs: dict, context: dict) -> bool:
+        from omni.pro.webhook.webhook_handler import WebhookHandler
+
+        celery_app = WebhookHandler.celery_app_for(context.get("tenant"))
+        if celery_app is None:
+            return False
+        try:
+            celery_app.send_task(
+                name=cls.spill_task_name, args=[cls.dump_spilled(crud_attrs), context], queue=cls.spill_queue
+            )
+            return True
+        except Exception as e:
+            _logger.error(f"Webhook dispatcher spill: {str(e)}")
+            return False
+
+    @classmethod
+    def _count(cls, key: str):
+        with cls._lock:
+            cls._stats[key] += 1
@@ -0,0 +1,73 @@
+import re
+from functools import lru_cache
+
+from omni.pro.logger import configure_logger
+
+_logger = configure_logger(name=__name__)
+
+
+class WebhookPlan(object):
+    """
+    A webhook compiled once for `WebhookHandler`: its condition, trigger fields and route.
+
+    `python_code` is compiled once and run on each record with the contract of `eval_condition`; a
+    condition that does not compile is logged and rejects every record. The ubiquitous `__result__ = True`,
+    like an empty condition, accepts every record without evaluating anything. Plans are shared between
+    threads and keyed by the definition, so an edited webhook gets a new plan.
+
+    Example:
+        plan = WebhookPlan.for_webhook(webhook)
+        records = [record for record in records if plan.accepts(record, modified_fields_by_id)]
+    """
+
+    ALWAYS = "__result__ = True"
+    CLICK_HOUSE = "click_house"
+
+    def __init__(self, python_code: str, trigger_fields: tuple, type_webhook: str, url: str):
+        self.type_webhook = type_webhook
+        self.url = url
+        self.always = not python_code or re.sub(r"\s+", " ", python_code).strip() == self.ALWAYS
+        self.condition = None if self.always else self._compile(python_code)
+        # Updates only reach the webhook when one of these fields changed, "active" always counts
+        self.trigger_fields = frozenset(attr.split("-", 1)[-1] for attr in trigger_fields) | {"active"}
+        self.filters_updates = bool(trigger_fields) and url != self.CLICK_HOUSE
+
+    @classmethod
+    def for_webhook(cls, webhook: dict) -> "WebhookPlan":
+        return cls._build(
+            webhook.get("python_code") or "",
+            tuple(webhook.get("trigger_fields") or ()),
+            webhook.get("type_webhook"),
+            webhook.get("url"),
+        )
+
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def _build(cls, python_code: str, trigger_fields: tuple, type_webhook: str, url: str) -> "WebhookPlan":
+        return cls(python_code, trigger_fields, type_webhook, url)
+
+    def accepts(self, record: dict, modified_fields_by_id: dict = None) -> bool:
+        """
+        Whether the webhook receives `record`. `modified_fields_by_id` is given for updates and holds the
+        changed fields by record id.
+        """
+        if modified_fields_by_id is not None and self.filters_updates:
+            if not modified_fields_by_id.get(record.get("id"), set()) & self.trigger_fields:
+                return False
+        if self.always:
+            return True
+        return self.condition is not None and self._evaluate(record)
+
+    def _evaluate(self, record: dict) -> bool:
+        # Same contract as eval_condition: the condition reads `record` and sets `__result__`
+        scope = {"record": record, "__result__": False}
+        exec(self.condition, scope)
+        return scope["__result__"]
+
+    @classmethod
+    def _compile(cls, python_code: str):
+        try:
+            return compile(python_code, "<webhook python_code>", "exec")
+        except SyntaxError as error:
+            _logger.error(f"Webhook python_code does not compile, no record is sent: {error}")
+            return None
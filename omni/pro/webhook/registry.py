@@ -0,0 +1,157 @@
+import json
+import threading
+import time
+from typing import Callable, Dict
+
+import redis
+from omni.pro.config import Config
+from omni.pro.logger import configure_logger
+
+_logger = configure_logger(name=__name__)
+
+
+class WebhookRegistry(object):
+    """
+    Process-wide cache of the definitions `WebhookHandler` reads on every transaction: events by code,
+    webhooks by event id and mirror models by code, per tenant.
+
+    Entries are refreshed after `ttl` seconds. Concurrent handlers of a tenant share a single load, the
+    others wait for it up to `load_timeout` seconds before loading it themselves, and a failed refresh
+    keeps serving the previous value. Entries are dropped with
+    `invalidate`, locally, or in every process with `publish_invalidation`, which is broadcast through the
+    Redis channel `CHANNEL` to the processes listening on it, see `listen`.
+
+    Example:
+        events = WebhookRegistry.get(tenant, WebhookRegistry.EVENTS, load_events)
+        WebhookRegistry.publish_invalidation(tenant, WebhookRegistry.WEBHOOKS)
+    """
+
+    EVENTS = "events"
+    WEBHOOKS = "webhooks"
+    MIRROR_MODELS = "mirror_models"
+    CLASSES = "classes"
+    CHANNEL = "omni:webhook_registry:invalidate"
+
+    ttl: float = 300.0
+    load_timeout: float = 30.0
+
+    _lock = threading.Lock()
+    _entries: Dict[tuple, tuple] = {}
+    _loading: Dict[tuple, threading.Event] = {}
+    _listener: threading.Thread = None
+
+    @classmethod
+    def configure(cls, **kwargs):
+        """
+        Sets the registry options.
+
+        Args:
+            **kwargs: `ttl` or `load_timeout` in seconds.
+        """
+        for key, value in kwargs.items():
+            if key not in ("ttl", "load_timeout"):
+                raise ValueError(f"Unknown webhook registry option: {key}")
+            setattr(cls, key, value)
+
+    @classmethod
+    def get(cls, tenant: str, kind: str, loader: Callable[[], object]):
+        """
+        Returns the cached value of `kind` for `tenant`, calling `loader` when it is missing or expired.
+        A loader that raises is logged and leaves the previous value, or None, until the next call.
+        """
+        key = (tenant, kind)
+        while True:
+            with cls._lock:
+                loaded_at, value = cls._entries.get(key, (None, None))
+                if loaded_at is not None and time.monotonic() - loaded_at < cls.ttl:
+                    return value
+                loading = cls._loading.get(key)
+                if loading is None:
+                    loading = cls._loading[key] = threading.Event()
+                    break
+            # Another thread is loading it, a stale value is good enough meanwhile
+            if loaded_at is not None:
+                return value
+            if loading.wait(cls.load_timeout):
+                with cls._lock:
+                    if key in cls._entries:
+                        return cls._entries[key][1]
+                return None
+            _logger.warning(f"Webhook registry {kind} of {tenant}: load still running, loading it again")
+            return cls._load(key, loader, None)
+
+        try:
+            value = cls._load(key, loader, value)
+        finally:
+            with cls._lock:
+                cls._loading.pop(key, None)
+            loading.set()
+        return value
+
+    @classmethod
+    def _load(cls, key: tuple, loader: Callable[[], object], previous):
+        try:
+            value = loader()
+        except Exception as e:
+            _logger.error(f"Webhook registry {key[1]} of {key[0]}: {str(e)}")
+            return previous
+        with cls._lock:
+            cls._entries[key] = (time.monotonic(), value)
+        return value
+
+    @classmethod
+    def invalidate(cls, tenant: str = None, kind: str = None):
+        """
+        Drops the entries of `tenant` and `kind`, every tenant or every kind when not given.
+        """
+        with cls._lock:
+            for key in list(cls._entries):
+                if (tenant is None or key[0] == tenant) and (kind is None or key[1] == kind):
+                    cls._entries.pop(key)
+
+    @classmethod
+    def publish_invalidation(cls, tenant: str = None, kind: str = None):
+        """
+        Invalidates the entries here and in every process listening on `CHANNEL`.
+        """
+        cls.invalidate(tenant, kind)
+        try:
+            cls._redis().publish(cls.CHANNEL, json.dumps({"tenant": tenant, "kind": kind}))
+        except Exception as e:
+            _logger.error(f"Webhook registry publish: {str(e)}")
+
+    @classmethod
+    def listen(cls):
+        """
+        Starts, once per process, a daemon thread applying the invalidations published on `CHANNEL`. The
+        `WebhookDispatcher` starts it with its workers and `register_webhook_tasks` in Celery workers.
+        """
+        with cls._lock:
+            if cls._listener is not None and cls._listener.is_alive():
+                return
+            cls._listener = threading.Thread(target=cls._listen, name="webhook-registry", daemon=True)
+            cls._listener.start()
+
+    @classmethod
+    def _listen(cls):
+        disconnected = False
+        while True:
+            try:
+                pubsub = cls._redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(cls.CHANNEL)
+                if disconnected:
+                    # Invalidations published while disconnected were missed, dropped once on reconnect
+                    cls.invalidate()
+                    disconnected = False
+                for message in pubsub.listen():
+                    data = json.loads(message["data"])
+                    cls.invalidate(data.get("tenant"), data.get("kind"))
+            except Exception as e:
+                if not disconnected:
+                    _logger.error(f"Webhook registry listener: {str(e)}")
+                disconnected = True
+                time.sleep(5)
+
+    @staticmethod
+    def _redis() -> redis.Redis:
+        return redis.Redis(host=Config.REDIS_HOST, port=Config.REDIS_PORT, db=Config.REDIS_DB, ssl=Config.REDIS_SSL)
@@ -1,6 +1,5 @@
 import json
 import threading
-import time
 from copy import copy, deepcopy
 from datetime import datetime
 from typing import Any, Dict, List, Set, Type
@@ -15,8 +14,12 @@ from omni.pro.logger import configure_logger
 from omni.pro.redis import RedisManager
 from omni.pro.user.access import INTERNAL_USER
 from omni.pro.util import measure_time
-from omni_pro_base.http_request import OmniRequest
-from omni_pro_base.util import eval_condition, nested
+from omni.pro.webhook.coalescer import WebhookCoalescer
+from omni.pro.webhook.delivery import WebhookDelivery
+from omni.pro.webhook.dispatcher import WebhookDispatcher
+from omni.pro.webhook.plan import WebhookPlan
+from omni.pro.webhook.registry import WebhookRegistry
+from omni_pro_base.util import nested
 from omni_pro_grpc.grpc_connector import Event, GRPClient
 from omni_pro_grpc.grpc_function import (
     EventRPCFucntion,
@@ -31,6 +34,9 @@ _logger = configure_logger(name=__name__)
 
 
 class WebhookHandler:
+    _celery_apps: Dict[str, Celery] = {}
+    _celery_apps_lock = threading.Lock()
+
     def __init__(self, crud_attrs: dict = {}, context: dict = {}) -> None:
         context.update({"user": INTERNAL_USER})
         self.type_db = context.pop("type_db") if "type_db" in context else None
@@ -66,21 +72,30 @@ class WebhookHandler:
         self.celery_app: Celery = self._get_celery_app()
 
     def _get_celery_app(self):
-        try:
-            return CeleryRedis(self.tenant).app
-        except Exception as e:
-            _logger.error(f"{str(e)}")
+        return self.celery_app_for(self.tenant)
+
+    @classmethod
+    def celery_app_for(cls, tenant: str):
+        # One app per tenant for the process, handlers are created for every transaction
+        with cls._celery_apps_lock:
+            if tenant not in cls._celery_apps:
+                try:
+                    cls._celery_apps[tenant] = CeleryRedis(tenant).app
+                except Exception as e:
+                    _logger.error(f"{str(e)}")
+                    return None
+            return cls._celery_apps[tenant]
 
     @classmethod
     def start_thread(cls, crud_attrs: dict, context: dict):
         """
-        Starts a new thread to handle webhook processing if certain CRUD attributes are present.
+        Queues the webhook processing if certain CRUD attributes are present.
 
         This method checks for the presence of "created_attrs", "updated_attrs", or "deleted_attrs"
         within the provided CRUD attributes dictionary. If any of these attributes exist, and both
-        the "tenant" and "type_db" are defined in the context, a new thread is created to process
-        the webhook via the `WebhookHandler` class. If either "tenant" or "type_db" are missing, an
-        error is logged.
+        the "tenant" and "type_db" are defined in the context, they are submitted, through the optional
+        `WebhookCoalescer`, to the `WebhookDispatcher`, whose workers process them via the
+        `WebhookHandler` class. If either "tenant" or "type_db" are missing, an error is logged.
 
         Args:
             crud_attrs (dict): A dictionary containing the CRUD attributes ("created_attrs",
@@ -96,12 +111,22 @@ class WebhookHandler:
             if tenant and not context.get("tenant"):
                 context["tenant"] = tenant
             if context.get("tenant") and context.get("type_db"):
-                webhook_handler = WebhookHandler(crud_attrs, context)
-                thread = threading.Thread(target=webhook_handler.resolve_interface)
-                thread.start()
+                WebhookCoalescer.submit(crud_attrs, context)
             else:
                 _logger.error(f"Tenant or type db is not defined")
 
+    @classmethod
+    def from_spilled(cls, payload: dict, context: dict) -> "WebhookHandler":
+        """
+        Builds the handler of the CRUD attributes that `WebhookDispatcher` spilled to Celery, restoring
+        their sets of changed fields.
+
+        Args:
+            payload (dict): The CRUD attributes sent by `WebhookDispatcher.dump_spilled`.
+            context (dict): The context of the transaction, with "tenant" and "type_db".
+        """
+        return cls(WebhookDispatcher.load_spilled(payload), context)
+
     @classmethod
     def _get_tenant_in_crud_attrs(cls, crud_attrs: dict) -> str:
         created_attrs = crud_attrs.get("created_attrs")
@@ -166,8 +191,11 @@ class WebhookHandler:
         """
         Processes and dispatches webhooks based on CRUD operations and event data.
 
-        This method initiates a short delay to allow for any asynchronous operations to settle.
-        It then sets the internal state for events and associated webhooks using the provided
+        The CRUD attributes are handed off only after the changes are durable: SQL sessions after their
+        commit returns (see `CustomSession.dispatch_crud_attrs`) and document stacks on exit, once every
+        acknowledged write is done. The handler reads the instances from the primary in a new transaction
+        or query, so they are visible without waiting.
+        This method sets the internal state for events and associated webhooks using the provided
         CRUD attributes ("created_attrs", "updated_attrs", and "deleted_attrs"). If the required
         event or webhook data is not found, the process is halted. Once the internal and external
         webhook records are established, the method triggers the dispatch of the webhooks.
@@ -175,7 +203,6 @@ class WebhookHandler:
         Returns:
             None
         """
-        time.sleep(0.2)
         self._set_event_by_code()
         if not self.event_by_code:
             return
@@ -210,8 +237,13 @@ class WebhookHandler:
             elif webhook.get("url") == "click_house":
                 self._create_click_house_task(webhook_entry)
 
-        for webhook_entry in self.external_webhook_records:
-            self._send_external_webhook_records(webhook_entry)
+        # External webhooks are all queued first so a slow partner does not hold back the others
+        external_deliveries = [
+            (webhook_entry, self._deliver_external_webhook_records(webhook_entry))
+            for webhook_entry in self.external_webhook_records
+        ]
+        for webhook_entry, deliveries in external_deliveries:
+            self._check_external_webhook_delivery(webhook_entry, deliveries)
 
         for webhook_entry in self.notification_webhook_records:
             self._send_notification_webhook_records(webhook_entry)
@@ -383,10 +415,10 @@ class WebhookHandler:
         """
         Sends external webhook records to a specified URL with pagination and handles errors or retries.
 
-        This method divides the external webhook records into paginated sublists and sends each group
-        to the specified URL using the `OmniRequest.make_request` method. If an error occurs during the
-        request, it logs the error and, depending on the configuration, either raises an exception or
-        creates a Celery task to handle the retry.
+        This method divides the external webhook records into paginated sublists and sends every group
+        concurrently through `WebhookDelivery`, see `_deliver_external_webhook_records`, then waits for
+        them. If a request fails, it logs the error and, depending on the configuration, either raises an
+        exception or creates a Celery task to retry the records of the failed pages.
 
         Args:
             webhook_entry (dict): A dictionary containing the webhook data, including the URL, method,
@@ -399,33 +431,45 @@ class WebhookHandler:
         Raises:
             Exception: If the process fails and `send_to_queue` is not enabled.
         """
+        deliveries = self._deliver_external_webhook_records(webhook_entry, timeout=timeout)
+        return self._check_external_webhook_delivery(webhook_entry, deliveries)
+
+    def _deliver_external_webhook_records(self, webhook_entry: dict, timeout: float = 0) -> list[tuple]:
+        """
+        Queues every page of the external webhook records in `WebhookDelivery` without waiting.
+
+        Returns:
+            list[tuple]: The records of each page with the future of its request.
+        """
         webhook = webhook_entry.get("webhook")
         records = webhook_entry.get("records")
+        timeout = timeout or webhook.get("timeout") or self.timeout_external
         paginated_records = [
             records[i : i + self.paginated_limit_records] for i in range(0, len(records), self.paginated_limit_records)
         ]
-        for sub_records in paginated_records:
+        return [
+            (sub_records, WebhookDelivery.submit(webhook, sub_records, timeout)) for sub_records in paginated_records
+        ]
+
+    def _check_external_webhook_delivery(self, webhook_entry: dict, deliveries: list[tuple]) -> bool:
+        failed_records, message = [], ""
+        for sub_records, future in deliveries:
             try:
-                url = webhook.get("url")
-                auth = webhook.get("auth")
-                response = OmniRequest.make_request(
-                    url,
-                    webhook.get("method"),
-                    json=sub_records,
-                    tipo_auth=webhook.get("auth_type"),
-                    auth_params=auth,
-                    timeout=timeout or self.timeout_external,
-                )
-                response.raise_for_status()
-                return True
+                future.result()
             except Exception as e:
                 message = str(e)
                 _logger.error(f"send external webhook: {str(e)}")
-                if self.send_to_queue:
-                    webhook_entry["message"] = message
-                    self._create_celery_task(webhook_entry)
-                else:
-                    raise Exception(message)
+                failed_records.extend(sub_records)
+        if not failed_records:
+            return True
+        if self.send_to_queue:
+            # Only the pages that failed are retried
+            webhook_entry_retry = copy(webhook_entry)
+            webhook_entry_retry["records"] = failed_records
+            webhook_entry_retry["message"] = message
+            self._create_celery_task(webhook_entry_retry)
+            return False
+        raise Exception(message)
 
     def _build_and_send_records_to_mirror_models(self, webhook_entry: dict):
         """
@@ -573,29 +617,14 @@ class WebhookHandler:
                             instance.generate_dict() if isinstance(instance, Document) else instance.model_to_dict()
                             for instance in instances
                         ]
+                        modified_fields_by_id = data_attrs if event_operation == "update" else None
                         for webhook in webhooks:
-                            webhook_url = webhook.get("url")
+                            plan = WebhookPlan.for_webhook(webhook)
                             records: list[dict] = [
-                                item
-                                for item in instances_attrs
-                                if not webhook.get("python_code") or eval_condition(item, webhook.get("python_code"))
+                                item for item in instances_attrs if plan.accepts(item, modified_fields_by_id)
                             ]
-                            if event_operation == "update" and webhook_url != "click_house":
-                                if webhook.get("trigger_fields"):
-                                    trigger_fields = set(
-                                        [attr.split("-", 1)[-1] for attr in webhook.get("trigger_fields")]
-                                    )
-                                    if not "active" in trigger_fields:
-                                        trigger_fields.add("active")
-                                    filter_records = []
-                                    for record in records:
-                                        record_id = record.get("id")
-                                        modified_fields = data_attrs.get(record_id, set())
-                                        if modified_fields & trigger_fields:
-                                            filter_records.append(record)
-                                    records = filter_records
                             if records:
-                                type_webhook = webhook.get("type_webhook")
+                                type_webhook = plan.type_webhook
                                 webhook_entry = {"event": event, "webhook": webhook, "records": records, "message": ""}
                                 if type_webhook == "internal":
                                     self.internal_webhook_records.append(webhook_entry)
@@ -697,9 +726,12 @@ class WebhookHandler:
                     instances: list[class_model] = []
                     model_ids = list(model_attrs.keys()) if isinstance(model_attrs, dict) else model_attrs
                     if self.session:
+                        from omni.pro.database import EagerLoadPlanner
+
                         instances = (
                             self.session.query(class_model)
                             .filter(class_model.id.in_(model_ids), class_model.tenant == self.tenant)
+                            .options(*EagerLoadPlanner.options(class_model))
                             .all()
                         )
                     elif self.type_db == "document":
@@ -732,72 +764,79 @@ class WebhookHandler:
     def _set_webhooks_by_event_id(
         self,
     ) -> Dict[str, list]:
-        webhooks_by_event_id: Dict[str, list] = {}
-
-        try:
-            filter = {
-                "filter": {"filter": f"[('active','=',True)]"},
-                "paginated": {"offset": 1, "limit": self.paginated_limit},
-            }
-            response, success, _e = self.rpc_webhook.read_webhook(filter)
-
-            if success:
-                for webhook in response.webhooks:
-                    for event in webhook.events:
-                        event_id = event.id
-                        if not event_id in webhooks_by_event_id:
-                            webhooks_by_event_id[event_id] = []
-                        webhook_dict = json_format.MessageToDict(webhook, preserving_proto_field_name=True)
-                        priority_map = {"critical": 1, "high": 2, "medium": 3, "low": 4, "very_low": 5}
-                        priority_code = webhook_dict.get("priority_level", {}).get("code", "medium")
-                        webhook_dict["priority_level"] = priority_map.get(priority_code)
-                        webhooks_by_event_id[event_id].append(webhook_dict)
-        except Exception as ex:
-            _logger.error(f"_set_webhooks_by_event_id: {str(ex)}")
+        self.webhooks_by_event_id = (
+            WebhookRegistry.get(self.tenant, WebhookRegistry.WEBHOOKS, self._load_webhooks_by_event_id) or {}
+        )
 
-        self.webhooks_by_event_id = webhooks_by_event_id
+    def _load_webhooks_by_event_id(self) -> Dict[str, list]:
+        webhooks_by_event_id: Dict[str, list] = {}
+        filter = {
+            "filter": {"filter": f"[('active','=',True)]"},
+            "paginated": {"offset": 1, "limit": self.paginated_limit},
+        }
+        response, success, _e = self.rpc_webhook.read_webhook(filter)
+        if not success:
+            raise Exception(f"read_webhook: {_e}")
+
+        priority_map = {"critical": 1, "high": 2, "medium": 3, "low": 4, "very_low": 5}
+        for webhook in response.webhooks:
+            webhook_dict = json_format.MessageToDict(webhook, preserving_proto_field_name=True)
+            priority_code = webhook_dict.get("priority_level", {}).get("code", "medium")
+            webhook_dict["priority_level"] = priority_map.get(priority_code)
+            for event in webhook.events:
+                event_id = event.id
+                if not event_id in webhooks_by_event_id:
+                    webhooks_by_event_id[event_id] = []
+                webhooks_by_event_id[event_id].append(webhook_dict)
+        return webhooks_by_event_id
 
     @measure_time
     def _set_event_by_code(
         self,
     ) -> Dict[str, object]:
-        try:
-            filter_event = {
-                "filter": {"filter": f"[('active','=',True)]"},
-                "paginated": {"offset": 1, "limit": self.paginated_limit},
-            }
-            response, success, _e = self.rpc_event.read_event(filter_event)
-            if success:
-                self.event_by_code = {
-                    event.code: json_format.MessageToDict(event, preserving_proto_field_name=True)
-                    for event in response.events
-                }
-        except Exception as ex:
-            _logger.error(f"_set_event_by_code: {str(ex)}")
+        self.event_by_code = WebhookRegistry.get(self.tenant, WebhookRegistry.EVENTS, self._load_event_by_code) or {}
+
+    def _load_event_by_code(self) -> Dict[str, object]:
+        filter_event = {
+            "filter": {"filter": f"[('active','=',True)]"},
+            "paginated": {"offset": 1, "limit": self.paginated_limit},
+        }
+        response, success, _e = self.rpc_event.read_event(filter_event)
+        if not success:
+            raise Exception(f"read_event: {_e}")
+        return {
+            event.code: json_format.MessageToDict(event, preserving_proto_field_name=True) for event in response.events
+        }
 
     def _set_models_mirror_by_code(
         self,
     ) -> Dict[str, object]:
         if not self.models_mirror_by_code:
-            try:
-                params = {
-                    "filter": {"filter": f"[('is_replic','=', true)]"},
-                    "paginated": {"offset": 1, "limit": self.paginated_limit},
-                }
-                response, success, _e = self.rpc_model.read_model(params)
-
-                if success:
-                    for model in response.models:
-                        model_code = model.code
-                        if not model_code in self.models_mirror_by_code:
-                            self.models_mirror_by_code[model_code] = []
-                        self.models_mirror_by_code[model_code].append(
-                            json_format.MessageToDict(model, preserving_proto_field_name=True)
-                        )
-            except Exception as ex:
-                _logger.error(f"_set_models_mirror_by_code: {str(ex)}")
+            self.models_mirror_by_code = (
+                WebhookRegistry.get(self.tenant, WebhookRegistry.MIRROR_MODELS, self._load_models_mirror_by_code) or {}
+            )
+
+    def _load_models_mirror_by_code(self) -> Dict[str, list]:
+        models_mirror_by_code: Dict[str, list] = {}
+        params = {
+            "filter": {"filter": f"[('is_replic','=', true)]"},
+            "paginated": {"offset": 1, "limit": self.paginated_limit},
+        }
+        response, success, _e = self.rpc_model.read_model(params)
+        if not success:
+            raise Exception(f"read_model: {_e}")
+
+        for model in response.models:
+            model_code = model.code
+            if not model_code in models_mirror_by_code:
+                models_mirror_by_code[model_code] = []
+            models_mirror_by_code[model_code].append(json_format.MessageToDict(model, preserving_proto_field_name=True))
+        return models_mirror_by_code
 
     def _get_class_by_name(self) -> Dict[str, Type[object]]:
+        return WebhookRegistry.get(None, f"{WebhookRegistry.CLASSES}:{self.type_db}", self._load_class_by_name) or {}
+
+    def _load_class_by_name(self) -> Dict[str, Type[object]]:
         """
         Retrieves a dictionary mapping collection or table names to their respective class types.
 
@@ -57,7 +57,11 @@ setup(
     extras_require={
         "dev": [
             "pytest",
-        ]
+        ],
+        "async": [
+            "asyncpg",
+            "motor",
+        ],
     },
     test_suite="tests",
     python_requires=">=3.9",
@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("omni_pro_base")
+
+from omni.pro.database import FIRST_PAGE
+from omni.pro.database.mongo import DocumentKeysetPagination
+from omni.pro.database.pagination import is_first_page, keyset_cursor
+from omni.pro.database.postgres import KeysetPagination
+from omni.pro.models.base import BaseModel
+from sqlalchemy import String, create_engine
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+
+class KeysetProduct(BaseModel):
+    name: Mapped[str] = mapped_column(String(50), nullable=False)
+
+
+def sort_by(name_field: str, descending: bool = False):
+    return SimpleNamespace(name_field=name_field, type=1 if descending else 0, DESC=1)
+
+
+def test_unset_cursor_means_offset_pagination():
+    assert keyset_cursor("") is None
+    assert keyset_cursor(None) is None
+    assert is_first_page(keyset_cursor(FIRST_PAGE))
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_postgres_pages_cover_every_row_once(descending):
+    engine = create_engine("sqlite://")
+    KeysetProduct.__table__.create(engine)
+    with Session(engine) as session:
+        session.add_all([KeysetProduct(name=f"n{idx % 3}", tenant="TEST", updated_by="user") for idx in range(7)])
+        session.commit()
+        columns = KeysetPagination.sort_columns(KeysetProduct, sort_by("name", descending))
+        query = session.query(KeysetProduct).order_by(*KeysetPagination.order_by(columns))
+        cursor, pages = FIRST_PAGE, []
+        while cursor:
+            rows, cursor = KeysetPagination.paginate(query, columns, cursor, 3)
+            pages.append([(row.name, row.id) for row in rows])
+        assert [len(page) for page in pages] == [3, 3, 1]
+        assert sum(pages, []) == [(row.name, row.id) for row in query]
+
+
+def test_postgres_cursor_must_match_the_sort():
+    columns = KeysetPagination.sort_columns(KeysetProduct, sort_by("name"))
+    with pytest.raises(ValueError):
+        KeysetPagination.decode(KeysetPagination.encode(SimpleNamespace(id=1), columns[1:]), columns)
+
+
+@pytest.fixture
+def collection():
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient().db.keyset
+    collection.insert_many([{"code": f"c{idx}", "rank": idx % 3} for idx in range(7)])
+    return collection
+
+
+def read_pages(collection, stages_of_page) -> list:
+    keys = DocumentKeysetPagination.sort_keys([("rank", -1)])
+    cursor, pages = FIRST_PAGE, []
+    while cursor:
+        stages = DocumentKeysetPagination.stages(keys, cursor, 3) + stages_of_page(keys)
+        items, cursor = DocumentKeysetPagination.page(list(collection.aggregate(stages)), keys, 3)
+        pages.append(items)
+    return pages
+
+
+def test_mongo_pages_cover_every_document_once(collection):
+    pages = read_pages(collection, lambda keys: [])
+    assert [len(page) for page in pages] == [3, 3, 1]
+    expected = list(collection.find().sort([("rank", -1), ("_id", -1)]))
+    assert sum(pages, []) == expected
+
+
+def test_mongo_token_reads_values_kept_before_replacing_the_document(collection):
+    # The sort key only exists before $replaceRoot, as the fields of a joined reference
+    for document in collection.find():
+        collection.update_one({"_id": document["_id"]}, {"$set": {"original": {"_id": document["_id"]}}})
+    pages = read_pages(
+        collection,
+        lambda keys: [
+            DocumentKeysetPagination.keep_values(keys, "original"),
+            {"$replaceRoot": {"newRoot": "$original"}},
+        ],
+    )
+    assert [len(page) for page in pages] == [3, 3, 1]
+    expected = [{"_id": document["_id"]} for document in collection.find().sort([("rank", -1), ("_id", -1)])]
+    assert sum(pages, []) == expected
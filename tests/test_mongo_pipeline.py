@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip("omni_pro_base")
+
+import mongoengine as mongo
+from bson import ObjectId
+from omni.pro.database.mongo import DatabaseManager
+
+WAREHOUSE_ID = "65e1e7c1379356701b5f6b59"
+
+
+class PipelineWarehouse(mongo.Document):
+    name = mongo.StringField()
+
+
+class PipelineStock(mongo.Document):
+    code = mongo.StringField()
+    warehouse = mongo.ReferenceField(PipelineWarehouse)
+
+
+@pytest.fixture
+def manager():
+    return DatabaseManager.__new__(DatabaseManager)
+
+
+def stages(pipeline: list, name: str) -> list:
+    return [stage[name] for stage in pipeline if name in stage]
+
+
+def test_reference_id_in_and_matches_the_stored_id(manager):
+    pipeline = manager.parse_expression_to_pipeline(PipelineStock, [("warehouse__id", "=", WAREHOUSE_ID)], None)
+    assert pipeline == [{"$match": {"warehouse": {"$eq": ObjectId(WAREHOUSE_ID)}}}]
+
+
+def test_reference_id_in_or_matches_the_joined_id(manager):
+    pipeline = manager.parse_expression_to_pipeline(
+        PipelineStock, ["or", ("warehouse__id", "=", WAREHOUSE_ID), ("warehouse__name", "=", "main")], None
+    )
+    (lookup,) = stages(pipeline, "$lookup")
+    assert lookup["as"] == "warehouse"
+    assert lookup["let"] == {"ref": "$warehouse"}
+    (joined_match,) = stages(pipeline, "$match")
+    assert {"warehouse._id": {"$eq": ObjectId(WAREHOUSE_ID)}} in joined_match["$or"]
+    assert {"warehouse.name": {"$eq": "main"}} in joined_match["$or"]
+
+
+def test_reference_is_joined_once(manager):
+    pipeline = manager.parse_expression_to_pipeline(
+        PipelineStock,
+        ["and", ("warehouse__name", "=", "main"), ("warehouse__name", "!=", "old"), ("code", "=", "A")],
+        None,
+        tenant="TEST",
+    )
+    assert pipeline[0] == {"$match": {"$and": [{"context.tenant": "TEST"}, {"code": {"$eq": "A"}}]}}
+    assert len(stages(pipeline, "$lookup")) == 1
+    # A positive condition of the AND requires the reference
+    assert stages(pipeline, "$unwind") == [{"path": "$warehouse", "preserveNullAndEmptyArrays": False}]
@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("omni_pro_base")
+
+from omni.pro.database.postgres import PostgresDatabaseManager
+from omni.pro.models.base import BaseModel
+from sqlalchemy import String, create_engine
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+
+class FilterProduct(BaseModel):
+    name: Mapped[str] = mapped_column(String(50), nullable=True)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    FilterProduct.__table__.create(engine)
+    with Session(engine) as session:
+        session.add_all([FilterProduct(name=name, tenant="TEST", updated_by="user") for name in "abc"])
+        session.commit()
+        yield session
+
+
+def names(query) -> list:
+    return sorted(product.name for product in query)
+
+
+def test_filters_keep_their_values_when_combined(session):
+    manager = PostgresDatabaseManager.__new__(PostgresDatabaseManager)
+    query = manager.parse_expression([("name", "!=", "a")], session.query(FilterProduct), FilterProduct)
+    query = manager.parse_expression([("name", "!=", "b")], query, FilterProduct)
+    assert names(query) == ["c"]
+    query = manager.parse_expression([("name", "in", ["a", "b"])], session.query(FilterProduct), FilterProduct)
+    query = manager.parse_expression([("name", "in", ["b", "c"])], query, FilterProduct)
+    assert names(query) == ["b"]
+
+
+def test_plan_is_reused_with_new_values(session):
+    manager = PostgresDatabaseManager.__new__(PostgresDatabaseManager)
+    for name in "abc":
+        query = manager.parse_expression(
+            ["or", ("name", "=", name), ("name", "like", "zz")], session.query(FilterProduct), FilterProduct
+        )
+        assert names(query) == [name]
@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("omni_pro_base")
+
+from omni.pro.database import postgres
+from omni.pro.database.postgres import PostgresDatabaseManager
+from omni.pro.models.base import BaseModel
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class Sale(BaseModel):
+    name: Mapped[str] = mapped_column(String(50), nullable=True)
+    client_id: Mapped[int] = mapped_column(Integer, nullable=True)
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(postgres.Config, "PROCESS_WEBHOOK", True, raising=False)
+    return PostgresDatabaseManager.__new__(PostgresDatabaseManager)
+
+
+def session():
+    return SimpleNamespace(created_attrs={}, updated_attrs={}, deleted_attrs={}, context={})
+
+
+def test_upserted_rows_are_reported_as_created_or_updated(manager):
+    records = {
+        "a": {"external_id": "a", "name": "A", "client_id": 1, "tenant": "TEST", "updated_by": "user"},
+        "b": {"external_id": "b", "name": "B", "client_id": 2, "tenant": "TEST", "updated_by": "user"},
+    }
+    rows = [
+        SimpleNamespace(id=1, external_id="a", inserted=True),
+        SimpleNamespace(id=2, external_id="b", inserted=False),
+    ]
+    upsert_session = session()
+    upsert_session.updated_attrs["sale"] = {2: {"active"}}
+    manager._assign_upsert_crud_attrs(Sale, upsert_session, rows, {"name", "client_id"}, records)
+    assert upsert_session.created_attrs == {"sale": [1]}
+    assert upsert_session.updated_attrs == {"sale": {2: {"active", "name", "client_id"}}}
+    assert upsert_session.context == {"tenant": "TEST", "user": "user"}
+
+
+def test_model_rules_see_the_upserted_values(manager):
+    # A sale without client is not reported, see Base._can_write_crud_values
+    records = {"a": {"external_id": "a", "name": "A", "tenant": "TEST", "updated_by": "user"}}
+    upsert_session = session()
+    manager._assign_upsert_crud_attrs(
+        Sale, upsert_session, [SimpleNamespace(id=1, external_id="a", inserted=True)], {"name"}, records
+    )
+    assert upsert_session.created_attrs == {}
+
+
+def test_not_upserted_records_keep_only_columns():
+    data = {
+        "models": [{"external_id": "a", "name": "A"}, {"external_id": "b", "name": "B", "unknown": 1}],
+        "context": {"tenant": "TEST", "user": "user"},
+    }
+    result = {"inserted": [{"external_id": "a"}], "updated": []}
+    (record,) = PostgresDatabaseManager._not_upserted(Sale, data, result)
+    assert (record.external_id, record.name, record.tenant, record.updated_by) == ("b", "B", "TEST", "user")
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("omni_pro_base")
+
+from omni.pro.webhook.coalescer import _CoalescedChanges
+
+
+def changes(*crud_attrs_list):
+    coalesced = _CoalescedChanges(deadline=0, context={})
+    for crud_attrs in crud_attrs_list:
+        coalesced.merge(crud_attrs)
+    return coalesced
+
+
+def test_create_then_update_is_only_created():
+    coalesced = changes({"created_attrs": {"order": [1]}}, {"updated_attrs": {"order": {1: {"state"}}}})
+    assert coalesced.crud_attrs() == {"created_attrs": {"order": [1]}, "updated_attrs": {}, "deleted_attrs": {}}
+    assert coalesced.size == 1
+
+
+def test_create_then_delete_is_not_reported():
+    coalesced = changes({"created_attrs": {"order": [1]}}, {"deleted_attrs": {"order": [1]}})
+    assert coalesced.crud_attrs() == {"created_attrs": {}, "updated_attrs": {}, "deleted_attrs": {}}
+    assert coalesced.size == 0
+
+
+def test_update_then_delete_is_only_deleted():
+    coalesced = changes({"updated_attrs": {"order": {1: {"state"}}}}, {"deleted_attrs": {"order": [1]}})
+    assert coalesced.crud_attrs() == {"created_attrs": {}, "updated_attrs": {}, "deleted_attrs": {"order": [1]}}
+    assert coalesced.size == 1
+
+
+def test_updates_join_their_fields():
+    coalesced = changes(
+        {"updated_attrs": {"order": {1: {"state"}, 2: {"name"}}}},
+        {"updated_attrs": {"order": {1: {"total", "state"}}}},
+    )
+    assert coalesced.crud_attrs()["updated_attrs"] == {"order": {1: {"state", "total"}, 2: {"name"}}}
+    assert coalesced.size == 2
+
+
+def test_tenant_entry_is_skipped():
+    coalesced = changes({"created_attrs": {"tenant": "TEST", "order": [1]}})
+    assert coalesced.crud_attrs()["created_attrs"] == {"order": [1]}
@@ -0,0 +1,21 @@
+import json
+
+import pytest
+
+pytest.importorskip("omni_pro_base")
+
+from omni.pro.webhook.dispatcher import WebhookDispatcher
+from omni.pro.webhook.plan import WebhookPlan
+
+
+def test_spilled_attributes_round_trip_through_json():
+    crud_attrs = {
+        "created_attrs": {"tenant": "TEST", "order": [1, 2]},
+        "updated_attrs": {"tenant": "TEST", "order": {3: {"state", "name"}}},
+        "deleted_attrs": {},
+    }
+    payload = json.loads(json.dumps(WebhookDispatcher.dump_spilled(crud_attrs)))
+    restored = WebhookDispatcher.load_spilled(payload)
+    assert restored == crud_attrs
+    plan = WebhookPlan.for_webhook({"trigger_fields": ["order-state"], "url": "https://partner.test/hook"})
+    assert plan.accepts({"id": 3}, restored["updated_attrs"]["order"])
@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("omni_pro_base")
+
+from omni.pro.webhook.plan import WebhookPlan
+
+
+def plan(python_code="__result__ = True", trigger_fields=(), url="https://partner.test/hook"):
+    return WebhookPlan.for_webhook(
+        {"python_code": python_code, "trigger_fields": list(trigger_fields), "type_webhook": "external", "url": url}
+    )
+
+
+def test_always_accepts_every_record():
+    assert plan().always
+    assert plan("").accepts({"id": 1})
+    assert plan("  __result__  =  True ").accepts({"id": 1}, {1: {"name"}})
+
+
+def test_condition_is_evaluated_on_the_record():
+    webhook = plan("__result__ = record['state'] == 'done'")
+    assert webhook.accepts({"id": 1, "state": "done"})
+    assert not webhook.accepts({"id": 2, "state": "draft"})
+
+
+def test_updates_need_a_trigger_field():
+    webhook = plan(trigger_fields=("order-state",))
+    assert webhook.accepts({"id": 1}, {1: {"state", "name"}})
+    assert webhook.accepts({"id": 1}, {1: {"active"}})
+    assert not webhook.accepts({"id": 1}, {1: {"name"}})
+    assert not webhook.accepts({"id": 2}, {1: {"state"}})
+    # Creations and deletions carry no changed fields
+    assert webhook.accepts({"id": 2})
+
+
+def test_click_house_receives_every_update():
+    assert plan(trigger_fields=("order-state",), url=WebhookPlan.CLICK_HOUSE).accepts({"id": 1}, {1: {"name"}})
+
+
+def test_plans_are_shared_per_definition():
+    assert plan(trigger_fields=("order-state",)) is plan(trigger_fields=("order-state",))
+    assert plan(trigger_fields=("order-state",)) is not plan(trigger_fields=("order-name",))
+
+
+def test_condition_that_does_not_compile_rejects_every_record():
+    webhook = plan("__result__ = record[")
+    assert webhook.condition is None
+    assert not webhook.accepts({"id": 1})
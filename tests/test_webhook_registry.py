@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+pytest.importorskip("omni_pro_base")
+
+from omni.pro.webhook.registry import WebhookRegistry
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    options = {"ttl": WebhookRegistry.ttl, "load_timeout": WebhookRegistry.load_timeout}
+    WebhookRegistry.invalidate()
+    yield WebhookRegistry
+    WebhookRegistry.invalidate()
+    WebhookRegistry.configure(**options)
+
+
+def test_concurrent_gets_share_one_load():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"created": "evt-1"}
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(WebhookRegistry.get("TEST", "events", loader)))
+    first.start()
+    started.wait(5)
+    waiters = [
+        threading.Thread(target=lambda: results.append(WebhookRegistry.get("TEST", "events", loader)))
+        for _ in range(4)
+    ]
+    for thread in waiters:
+        thread.start()
+    release.set()
+    for thread in [first] + waiters:
+        thread.join(5)
+    assert len(calls) == 1
+    assert results == [{"created": "evt-1"}] * 5
+
+
+def test_failed_refresh_keeps_the_previous_value():
+    WebhookRegistry.configure(ttl=0)
+    assert WebhookRegistry.get("TEST", "events", lambda: "v1") == "v1"
+
+    def failing():
+        raise ConnectionError("unavailable")
+
+    assert WebhookRegistry.get("TEST", "events", failing) == "v1"
+    assert WebhookRegistry.get("TEST", "events", lambda: "v2") == "v2"
+
+
+def test_failed_first_load_returns_none():
+    def failing():
+        raise ConnectionError("unavailable")
+
+    assert WebhookRegistry.get("TEST", "events", failing) is None
+
+
+def test_invalidate_drops_the_entries_of_a_tenant():
+    WebhookRegistry.get("A", "events", lambda: "a")
+    WebhookRegistry.get("B", "events", lambda: "b")
+    WebhookRegistry.invalidate("A")
+    assert WebhookRegistry.get("A", "events", lambda: "a2") == "a2"
+    assert WebhookRegistry.get("B", "events", lambda: "b2") == "b"
+
+
+def test_unknown_option_is_rejected():
+    with pytest.raises(ValueError):
+        WebhookRegistry.configure(size=10)
+
+
+def test_waiters_load_themselves_when_the_load_hangs():
+    WebhookRegistry.configure(load_timeout=0.1)
+    started, release = threading.Event(), threading.Event()
+
+    def hanging():
+        started.set()
+        release.wait(5)
+        return "late"
+
+    first = threading.Thread(target=lambda: WebhookRegistry.get("TEST", "events", hanging))
+    first.start()
+    started.wait(5)
+    assert WebhookRegistry.get("TEST", "events", lambda: "direct") == "direct"
+    release.set()
+    first.join(5)